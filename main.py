@@ -1,30 +1,103 @@
-from flask import Flask, render_template_string, jsonify, request, send_file
+from flask import Flask, Response, g, render_template, jsonify, request, send_file, url_for
+from flask.json.provider import DefaultJSONProvider
 import requests
-import json
-from uuid import uuid4
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from markupsafe import Markup
+import orjson
 import time
-from datetime import datetime, timedelta
-import re
-from dateutil import parser
+from datetime import datetime, timezone
+import secrets
 import hashlib
+import re
 import os
 import csv
 import io
+import itertools
 import sqlite3
-from contextlib import closing
+from collections import OrderedDict
+from contextlib import closing, contextmanager
 import base64
+import gzip
+import queue
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON for jsonify and request.json through orjson
+    
+    Output matches the default provider's: sorted keys, indented only when
+    the default provider would indent.
+    """
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+# FLASK_-prefixed environment variables override config, e.g.
+# FLASK_USE_X_SENDFILE=true behind a front server that serves X-Sendfile
+app.config.from_prefixed_env()
+
+DB_PATH = 'temp_mail.db'
+
+# Timestamps are stored as integer milliseconds since the Unix epoch (UTC)
+def now_ms():
+    return int(time.time() * 1000)
+
+def format_ms(timestamp):
+    """Render an epoch-milliseconds timestamp as an ISO 8601 UTC string"""
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).isoformat(timespec='milliseconds')
+
+# Per-connection PRAGMAs; journal_mode=WAL is persisted in the database file
+# by init_db, but it is cheap to re-assert on every new connection.
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=30000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',
+    # Reads come straight from the OS page cache instead of being copied
+    # into each connection's own cache
+    'PRAGMA mmap_size=268435456',
+)
+
+def connect_db(initial_pragmas=(), isolation_level=''):
+    """Open a SQLite connection configured for concurrent reads and writes"""
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=isolation_level)
+    for pragma in (*initial_pragmas, *CONNECTION_PRAGMAS):
+        conn.execute(pragma)
+    return conn
 
 # Database setup
+# PRAGMA user_version from which timestamps are all stored as epoch milliseconds
+EPOCH_MS_SCHEMA_VERSION = 1
+
 def init_db():
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
+    # auto_vacuum has to be set before the WAL switch writes the file header,
+    # and only takes effect on a fresh database (or after VACUUM)
+    with closing(connect_db(initial_pragmas=('PRAGMA auto_vacuum=INCREMENTAL',))) as conn:
         conn.execute('''
             CREATE TABLE IF NOT EXISTS sessions (
                 session_id TEXT PRIMARY KEY,
                 email TEXT NOT NULL,
-                created_at TIMESTAMP NOT NULL,
-                last_activity TIMESTAMP NOT NULL,
+                created_at INTEGER NOT NULL,
+                last_activity INTEGER NOT NULL,
                 is_active INTEGER DEFAULT 1
             )
         ''')
@@ -37,7 +110,7 @@ def init_db():
                 subject TEXT,
                 body_preview TEXT,
                 full_content TEXT,
-                received_at TIMESTAMP NOT NULL,
+                received_at INTEGER NOT NULL,
                 is_read INTEGER DEFAULT 0,
                 FOREIGN KEY (session_id) REFERENCES sessions (session_id)
             )
@@ -47,69 +120,302 @@ def init_db():
                 archive_id TEXT PRIMARY KEY,
                 session_id TEXT NOT NULL,
                 archive_name TEXT,
-                created_at TIMESTAMP NOT NULL,
+                created_at INTEGER NOT NULL,
                 file_path TEXT,
                 FOREIGN KEY (session_id) REFERENCES sessions (session_id)
             )
         ''')
+        # Running totals that can't be recounted from the tables, such as
+        # how many messages have been deleted
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute("INSERT OR IGNORE INTO stats_counters (name) VALUES ('deleted_messages')")
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS count_deleted_messages
+            AFTER DELETE ON messages
+            BEGIN
+                UPDATE stats_counters SET value = value + 1 WHERE name = 'deleted_messages';
+            END
+        ''')
+        # Timestamps used to be stored as datetime strings; convert any such
+        # rows left over from older databases to epoch milliseconds. The scan
+        # only runs once per database, recorded in user_version
+        if conn.execute('PRAGMA user_version').fetchone()[0] < EPOCH_MS_SCHEMA_VERSION:
+            for table, column in (('sessions', 'created_at'), ('sessions', 'last_activity'),
+                                  ('messages', 'received_at'), ('archives', 'created_at')):
+                conn.execute(f'''
+                    UPDATE {table}
+                    SET {column} = CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER)
+                    WHERE typeof({column}) = 'text'
+                ''')
+            conn.execute(f'PRAGMA user_version = {EPOCH_MS_SCHEMA_VERSION}')
+        # Per-session inbox listing (ORDER BY received_at DESC) and unread counts
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_msg_session_time ON messages(session_id, received_at DESC, message_id DESC)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_msg_session_unread ON messages(session_id, is_read)')
+        # Active-session counts and the inactive-session cleanup sweep
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_active_activity ON sessions(is_active, last_activity)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_activity ON sessions(last_activity DESC, session_id DESC)')
         conn.commit()
 
 init_db()
 
-# Store active sessions in memory for quick access
-active_sessions = {}
-message_cache = {}
+class ConnectionPool:
+    """Fixed-size pool of long-lived SQLite connections"""
+    def __init__(self, size, isolation_level=''):
+        self._connections = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(connect_db(isolation_level=isolation_level))
+    
+    @contextmanager
+    def acquire(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._connections.put(conn)
+    
+    @contextmanager
+    def transaction(self):
+        """Run the block in a BEGIN IMMEDIATE transaction, committing on success
+        
+        The write lock is taken up front, so a busy database is waited out
+        by busy_timeout at BEGIN rather than failing at COMMIT.
+        """
+        with self.acquire() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+# Readers never wait on a writer checkout; SQLite allows a single writer anyway
+read_pool = ConnectionPool(size=8)
+# The writer runs in autocommit mode and manages transactions explicitly
+write_pool = ConnectionPool(size=1, isolation_level=None)
+
+class LRUCache:
+    """Thread-safe mapping bounded in size whose entries expire when idle"""
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] < now:
+            del self._entries[key]
+            return None
+        return entry
+    
+    def get(self, key, default=None):
+        with self._lock:
+            now = time.monotonic()
+            entry = self._live(key, now)
+            if entry is None:
+                return default
+            self._entries[key] = (entry[0], now + self.ttl)
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def __contains__(self, key):
+        # Membership checks don't count as use
+        with self._lock:
+            return self._live(key, time.monotonic()) is not None
+    
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[0]
+    
+    def values(self):
+        with self._lock:
+            now = time.monotonic()
+            return [value for value, expires in self._entries.values() if expires >= now]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Store active sessions in memory for quick access; evicted sessions are
+# hydrated again from the sessions table by get_active_session
+active_sessions = LRUCache(maxsize=10000, ttl=3600)
+# Full message payloads served by /get-message: session_id -> {message_id:
+# payload}. Payloads carry no read state, so only deletes invalidate them.
+message_cache = LRUCache(maxsize=1000, ttl=3600)
+
+# Per-session message statistics, invalidated by every write that touches a
+# session's messages. A cached entry is only stored if no write happened while
+# it was being computed, so readers never see stale counts: each computation
+# registers a token in stats_loads, and writes withdraw it. Only computations
+# in progress have an entry, so the dict stays small.
+stats_lock = threading.Lock()
+stats_cache = LRUCache(maxsize=10000, ttl=3600)
+stats_loads = {}
+
+# Counts across all sessions for the dashboard. They may be up to
+# GLOBAL_STATS_TTL seconds stale, and message writes drop them early;
+# concurrent misses wait on the lock for a single recomputation.
+GLOBAL_STATS_TTL = 10
+global_stats_lock = threading.Lock()
+global_stats = {'value': None, 'expires': 0.0}
+
+def invalidate_session(session_id):
+    """Drop cached statistics for one session after a write"""
+    with stats_lock:
+        stats_loads.pop(session_id, None)
+        stats_cache.pop(session_id, None)
+    global_stats['expires'] = 0.0
+
+def drop_cached_messages(session_id):
+    """Forget cached message payloads for a session after messages are deleted"""
+    message_cache.pop(session_id, None)
+
+def drop_cached_message(session_id, message_id):
+    """Forget one cached message payload, keeping the rest of the session's"""
+    cached = message_cache.get(session_id)
+    if cached is not None:
+        cached.pop(message_id, None)
+
+def invalidate_all_sessions():
+    """Drop cached statistics for every session after a bulk write"""
+    with stats_lock:
+        stats_loads.clear()
+        stats_cache.clear()
+    global_stats['expires'] = 0.0
+
+# Minimum time between persisted last_activity updates for a session
+ACTIVITY_FLUSH_INTERVAL_MS = 30 * 1000
 
 class TempMailSession:
-    def __init__(self, email, session_id):
+    def __init__(self, email, session_id, created_at=None):
         self.email = email
         self.session_id = session_id
-        self.created_at = datetime.utcnow()
-        self.last_check = datetime.utcnow()
+        self.created_at = now_ms() if created_at is None else created_at
+        self.last_check = self.created_at
+        self.last_persisted = self.created_at
         self.message_count = 0
         self.is_active = True
         self.custom_alias = None
         
-        # Store in database
-        with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-            conn.execute(
-                'INSERT OR REPLACE INTO sessions (session_id, email, created_at, last_activity, is_active) VALUES (?, ?, ?, ?, ?)',
-                (session_id, email, self.created_at, self.created_at, 1)
-            )
-            conn.commit()
+        # Store in database, unless this is an already stored session
+        if created_at is None:
+            with write_pool.transaction() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO sessions (session_id, email, created_at, last_activity, is_active) VALUES (?, ?, ?, ?, ?)',
+                    (session_id, email, self.created_at, self.created_at, 1)
+                )
+            invalidate_session(session_id)
         
         active_sessions[session_id] = self
     
+    @classmethod
+    def load(cls, session_id, conn=None):
+        """Rebuild an active session from the database, or return None
+        
+        Pass conn to read through a connection the caller already holds.
+        """
+        if conn is None:
+            with read_pool.acquire() as conn:
+                return cls.load(session_id, conn)
+        row = conn.execute(
+            'SELECT email, created_at, last_activity FROM sessions WHERE session_id = ? AND is_active = 1',
+            (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        session = cls(row[0], session_id, created_at=row[1])
+        session.last_check = session.last_persisted = row[2]
+        return session
+    
     def update_activity(self):
-        self.last_check = datetime.utcnow()
-        with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
+        self.last_check = now_ms()
+        # Polling calls this every few seconds; only persist it occasionally
+        if self.last_check - self.last_persisted < ACTIVITY_FLUSH_INTERVAL_MS:
+            return
+        with write_pool.transaction() as conn:
             conn.execute(
                 'UPDATE sessions SET last_activity = ? WHERE session_id = ?',
                 (self.last_check, self.session_id)
             )
-            conn.commit()
+        self.last_persisted = self.last_check
     
-    def deactivate(self):
+    def deactivate(self, conn=None):
+        """Mark the session inactive
+        
+        Pass conn to make the write part of a transaction the caller holds.
+        """
+        if conn is None:
+            with write_pool.transaction() as conn:
+                return self.deactivate(conn)
         self.is_active = False
-        with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-            conn.execute(
-                'UPDATE sessions SET is_active = 0 WHERE session_id = ?',
-                (self.session_id,)
-            )
-            conn.commit()
-        if self.session_id in active_sessions:
-            del active_sessions[self.session_id]
+        # Flush any activity that update_activity held back
+        conn.execute(
+            'UPDATE sessions SET is_active = 0, last_activity = ? WHERE session_id = ?',
+            (self.last_check, self.session_id)
+        )
+        active_sessions.pop(self.session_id, None)
+
+def get_active_session(session_id, conn=None):
+    """Look up an active session, hydrating it from the database on a miss"""
+    session = active_sessions.get(session_id)
+    if session is None:
+        session = TempMailSession.load(session_id, conn)
+    return session
+
+# Shared HTTP session so polling reuses the TCP/TLS connection to emailnator
+HTTP = requests.Session()
+HTTP.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Content-Type': 'application/json',
+    'Origin': 'https://www.emailnator.com',
+    'Referer': 'https://www.emailnator.com/'
+})
+# Every call is a POST, so retries are allowed for any method; read=0 keeps a
+# timed-out request from being sent again, leaving connect errors and
+# 502/503/504 as the only retried failures
+HTTP.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, read=0, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=None)
+))
+
+def request_email(strategy, headers):
+    """Ask emailnator for an address using one generation strategy"""
+    response = HTTP.post(
+        "https://api.emailnator.com/api/email/generate",
+        json=strategy,
+        headers=headers,
+        timeout=15
+    )
+    if response.status_code == 200:
+        data = response.json()
+        if 'email' in data:
+            return data['email']
+    return None
 
 def generate_email(use_custom_domain=False, custom_prefix=None):
     """Generate a temporary email address with optional customization"""
     headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'application/json',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-        'Content-Type': 'application/json',
-        'Origin': 'https://www.emailnator.com',
-        'Referer': 'https://www.emailnator.com/',
         'Sec-Fetch-Dest': 'empty',
         'Sec-Fetch-Mode': 'cors',
         'Sec-Fetch-Site': 'same-site'
@@ -123,26 +429,27 @@ def generate_email(use_custom_domain=False, custom_prefix=None):
             {"ids": [1]}         # Gmail-like only
         ]
         
-        email = None
-        for strategy in strategies:
-            try:
-                response = requests.post(
-                    "https://api.emailnator.com/api/email/generate",
-                    data=json.dumps(strategy),
-                    headers=headers,
-                    timeout=15
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'email' in data:
-                        email = data['email']
-                        break
-            except:
-                continue
+        # Fire all strategies at once and take the first address that comes
+        # back. Each request gets its own workers so one slow upstream call
+        # doesn't hold up other users; probes still running once an address
+        # is found finish in the background instead of being waited for
+        executor = ThreadPoolExecutor(max_workers=len(strategies))
+        try:
+            futures = [executor.submit(request_email, strategy, headers) for strategy in strategies]
+            email = None
+            for future in as_completed(futures):
+                try:
+                    email = future.result()
+                except Exception:
+                    continue
+                if email:
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
         if not email:
             # Fallback: generate a random email
-            random_part = hashlib.md5(str(uuid4()).encode()).hexdigest()[:10]
+            random_part = secrets.token_hex(5)
             email = f"{random_part}@tempmail.tmp"
         
         # Apply custom prefix if requested
@@ -151,7 +458,7 @@ def generate_email(use_custom_domain=False, custom_prefix=None):
             email = f"{custom_prefix}_{local_part}@{domain}"
         
         # Generate session ID
-        session_id = hashlib.sha256(f"{email}{datetime.utcnow().isoformat()}".encode()).hexdigest()[:12]
+        session_id = secrets.token_hex(6)
         
         # Create session object
         session = TempMailSession(email, session_id)
@@ -164,8 +471,8 @@ def generate_email(use_custom_domain=False, custom_prefix=None):
     except Exception as e:
         print(f"Error generating email: {e}")
         # Ultimate fallback
-        fallback_email = f"temp_{int(time.time())}_{uuid4().hex[:6]}@fallback.tmp"
-        session_id = hashlib.md5(fallback_email.encode()).hexdigest()[:10]
+        fallback_email = f"temp_{int(time.time())}_{secrets.token_hex(3)}@fallback.tmp"
+        session_id = secrets.token_hex(5)
         session = TempMailSession(fallback_email, session_id)
         return {
             'email': fallback_email,
@@ -174,2147 +481,629 @@ def generate_email(use_custom_domain=False, custom_prefix=None):
             'fallback': True
         }
 
-def get_inbox(email, session_id):
-    """Get inbox messages with enhanced parsing"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'application/json',
-        'Content-Type': 'application/json',
-        'Origin': 'https://www.emailnator.com',
-        'Referer': 'https://www.emailnator.com/'
-    }
-    
-    try:
-        response = requests.post(
-            "https://api.emailnator.com/api/email/inbox",
-            data=json.dumps({"email": email}),
-            headers=headers,
-            timeout=20
-        )
-        
-        if response.status_code != 200:
-            return {'messages': [], 'status': 'error', 'code': response.status_code}
-        
-        data = response.json()
-        
-        # Store messages in database
-        if 'messages' in data and data['messages']:
-            store_messages_in_db(data['messages'], session_id, email)
-        
-        return data
-    except Exception as e:
-        print(f"Error fetching inbox: {e}")
-        return {'messages': [], 'status': 'error', 'error': str(e)}
-
-def store_messages_in_db(messages, session_id, recipient_email):
-    """Store messages in SQLite database"""
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-        for msg in messages:
-            try:
-                # Extract message data
-                sender = 'Unknown'
-                subject = 'No Subject'
-                body_preview = 'No preview'
-                full_content = str(msg)
-                received_time = datetime.utcnow()
-                
-                if isinstance(msg, str):
-                    lines = msg.strip().split('\n')
-                    if len(lines) >= 3:
-                        sender = lines[0].replace('NEW', '').strip()
-                        subject = lines[2].strip() if len(lines) > 2 else 'No Subject'
-                        body_preview = lines[3].strip() if len(lines) > 3 else 'No preview'
-                elif isinstance(msg, dict):
-                    sender = msg.get('sender', 'Unknown')
-                    subject = msg.get('subject', 'No Subject')
-                    body_preview = msg.get('preview', 'No preview')
-                    if 'text' in msg and isinstance(msg['text'], str):
-                        full_content = msg['text']
-                
-                # Generate message ID
-                msg_id = hashlib.sha256(f"{sender}{subject}{body_preview}{received_time.isoformat()}".encode()).hexdigest()[:16]
-                
-                # Check if message already exists
-                cursor = conn.execute('SELECT message_id FROM messages WHERE message_id = ?', (msg_id,))
-                if not cursor.fetchone():
-                    conn.execute('''
-                        INSERT INTO messages 
-                        (message_id, session_id, sender, recipient, subject, body_preview, full_content, received_at, is_read)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (msg_id, session_id, sender, recipient_email, subject, body_preview, full_content, received_time, 0))
-                
-            except Exception as e:
-                print(f"Error storing message: {e}")
-                continue
-        
-        conn.commit()
-
-def get_session_messages(session_id, limit=50, offset=0, unread_only=False):
-    """Retrieve messages for a session from database"""
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-        query = '''
-            SELECT message_id, sender, recipient, subject, body_preview, 
-                   full_content, received_at, is_read
-            FROM messages 
-            WHERE session_id = ?
-        '''
-        params = [session_id]
-        
-        if unread_only:
-            query += ' AND is_read = 0'
-        
-        query += ' ORDER BY received_at DESC LIMIT ? OFFSET ?'
-        params.extend([limit, offset])
-        
-        cursor = conn.execute(query, params)
-        rows = cursor.fetchall()
-        
-        messages = []
-        for row in rows:
-            messages.append({
-                'id': row[0],
-                'sender': row[1],
-                'recipient': row[2],
-                'subject': row[3],
-                'preview': row[4],
-                'content': row[5],
-                'time': row[6],
-                'is_read': bool(row[7])
-            })
-        
-        # Get counts
-        cursor = conn.execute('SELECT COUNT(*) FROM messages WHERE session_id = ?', (session_id,))
-        total = cursor.fetchone()[0]
-        
-        cursor = conn.execute('SELECT COUNT(*) FROM messages WHERE session_id = ? AND is_read = 0', (session_id,))
-        unread = cursor.fetchone()[0]
-        
-        return {
-            'messages': messages,
-            'total': total,
-            'unread': unread,
-            'has_more': total > (offset + limit)
-        }
-
-def mark_as_read(message_id, session_id):
-    """Mark a message as read"""
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-        conn.execute(
-            'UPDATE messages SET is_read = 1 WHERE message_id = ? AND session_id = ?',
-            (message_id, session_id)
-        )
-        conn.commit()
-        return True
-
-def delete_message(message_id, session_id):
-    """Delete a specific message"""
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-        conn.execute(
-            'DELETE FROM messages WHERE message_id = ? AND session_id = ?',
-            (message_id, session_id)
-        )
-        conn.commit()
-        return True
-
-def export_messages(session_id, format_type='json'):
-    """Export messages in specified format"""
-    messages_data = get_session_messages(session_id, limit=1000, offset=0)
-    messages = messages_data['messages']
-    
-    if format_type == 'json':
-        return json.dumps(messages, indent=2, default=str)
-    elif format_type == 'csv':
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Sender', 'Recipient', 'Subject', 'Preview', 'Received At', 'Read'])
-        for msg in messages:
-            writer.writerow([
-                msg['sender'],
-                msg['recipient'],
-                msg['subject'],
-                msg['preview'],
-                msg['time'],
-                'Yes' if msg['is_read'] else 'No'
-            ])
-        return output.getvalue()
-    elif format_type == 'txt':
-        lines = []
-        for msg in messages:
-            lines.append(f"From: {msg['sender']}")
-            lines.append(f"To: {msg['recipient']}")
-            lines.append(f"Subject: {msg['subject']}")
-            lines.append(f"Time: {msg['time']}")
-            lines.append(f"Preview: {msg['preview']}")
-            lines.append("-" * 50)
-        return "\n".join(lines)
-    
-    return ""
-
-def get_session_stats(session_id):
-    """Get statistics for a session"""
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-        # Message stats
-        cursor = conn.execute('''
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN is_read = 0 THEN 1 ELSE 0 END) as unread,
-                MIN(received_at) as first_msg,
-                MAX(received_at) as last_msg
-            FROM messages 
-            WHERE session_id = ?
-        ''', (session_id,))
-        
-        stats = cursor.fetchone()
-        
-        # Session info
-        cursor = conn.execute('SELECT email, created_at FROM sessions WHERE session_id = ?', (session_id,))
-        session_info = cursor.fetchone()
-        
-        return {
-            'total_messages': stats[0] if stats[0] else 0,
-            'unread_messages': stats[1] if stats[1] else 0,
-            'first_message': stats[2],
-            'last_message': stats[3],
-            'email': session_info[0] if session_info else 'Unknown',
-            'created_at': session_info[1] if session_info else None,
-            'active': session_id in active_sessions
-        }
-
-# HTML Template with enhanced UI
-HTML_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>⚡ TempMail Control Center</title>
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-    <script src="https://cdn.jsdelivr.net/npm/sweetalert2@11"></script>
-    <style>
-        :root {
-            --primary: #6366f1;
-            --primary-dark: #4f46e5;
-            --secondary: #10b981;
-            --danger: #ef4444;
-            --warning: #f59e0b;
-            --dark: #1f2937;
-            --light: #f9fafb;
-            --gray: #6b7280;
-            --gray-light: #e5e7eb;
-            --sidebar-width: 280px;
-        }
-        
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-            font-family: 'Inter', sans-serif;
-        }
-        
-        body {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            color: var(--dark);
-        }
-        
-        .app-container {
-            display: flex;
-            min-height: 100vh;
-            background: var(--light);
-            border-radius: 20px;
-            margin: 20px;
-            overflow: hidden;
-            box-shadow: 0 25px 50px -12px rgba(0, 0, 0, 0.5);
-        }
-        
-        /* Sidebar Navigation */
-        .sidebar {
-            width: var(--sidebar-width);
-            background: var(--dark);
-            color: white;
-            padding: 30px 20px;
-            display: flex;
-            flex-direction: column;
-        }
-        
-        .logo {
-            display: flex;
-            align-items: center;
-            gap: 15px;
-            margin-bottom: 40px;
-            padding-bottom: 20px;
-            border-bottom: 2px solid var(--primary);
-        }
-        
-        .logo-icon {
-            font-size: 2.5rem;
-            color: var(--secondary);
-        }
-        
-        .logo-text h1 {
-            font-size: 1.5rem;
-            font-weight: 700;
-            background: linear-gradient(90deg, #6366f1, #10b981);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-        }
-        
-        .logo-text p {
-            font-size: 0.85rem;
-            opacity: 0.7;
-        }
-        
-        .nav-menu {
-            list-style: none;
-            flex-grow: 1;
-        }
-        
-        .nav-item {
-            margin-bottom: 10px;
-        }
-        
-        .nav-link {
-            display: flex;
-            align-items: center;
-            gap: 15px;
-            padding: 15px 20px;
-            color: white;
-            text-decoration: none;
-            border-radius: 12px;
-            transition: all 0.3s ease;
-            font-weight: 500;
-        }
-        
-        .nav-link:hover {
-            background: rgba(255, 255, 255, 0.1);
-            transform: translateX(5px);
-        }
-        
-        .nav-link.active {
-            background: var(--primary);
-            box-shadow: 0 4px 12px rgba(99, 102, 241, 0.3);
-        }
-        
-        .nav-link i {
-            font-size: 1.2rem;
-            width: 24px;
-            text-align: center;
-        }
-        
-        .session-info {
-            background: rgba(255, 255, 255, 0.1);
-            padding: 20px;
-            border-radius: 12px;
-            margin-top: 20px;
-        }
-        
-        .session-info h3 {
-            font-size: 0.9rem;
-            opacity: 0.8;
-            margin-bottom: 10px;
-        }
-        
-        .session-email {
-            font-size: 0.9rem;
-            word-break: break-all;
-            background: rgba(0, 0, 0, 0.3);
-            padding: 10px;
-            border-radius: 8px;
-            margin-bottom: 15px;
-        }
-        
-        .session-stats {
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 10px;
-            font-size: 0.8rem;
-        }
-        
-        .stat-item {
-            text-align: center;
-            padding: 8px;
-            background: rgba(0, 0, 0, 0.2);
-            border-radius: 6px;
-        }
-        
-        .stat-value {
-            font-weight: 700;
-            color: var(--secondary);
-        }
-        
-        /* Main Content */
-        .main-content {
-            flex-grow: 1;
-            padding: 30px;
-            overflow-y: auto;
-            background: white;
-        }
-        
-        .content-section {
-            display: none;
-            animation: fadeIn 0.3s ease;
-        }
-        
-        .content-section.active {
-            display: block;
-        }
-        
-        @keyframes fadeIn {
-            from { opacity: 0; transform: translateY(10px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-        
-        .section-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 30px;
-            padding-bottom: 20px;
-            border-bottom: 2px solid var(--gray-light);
-        }
-        
-        .section-title {
-            display: flex;
-            align-items: center;
-            gap: 15px;
-            font-size: 1.8rem;
-            font-weight: 700;
-            color: var(--dark);
-        }
-        
-        .section-title i {
-            color: var(--primary);
-            font-size: 2rem;
-        }
-        
-        /* Dashboard */
-        .stats-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 25px;
-            margin-bottom: 40px;
-        }
-        
-        .stat-card {
-            background: linear-gradient(135deg, var(--primary) 0%, var(--primary-dark) 100%);
-            color: white;
-            padding: 25px;
-            border-radius: 16px;
-            box-shadow: 0 10px 20px rgba(99, 102, 241, 0.2);
-        }
-        
-        .stat-card.secondary {
-            background: linear-gradient(135deg, var(--secondary) 0%, #059669 100%);
-        }
-        
-        .stat-card.warning {
-            background: linear-gradient(135deg, var(--warning) 0%, #d97706 100%);
-        }
-        
-        .stat-card.danger {
-            background: linear-gradient(135deg, var(--danger) 0%, #dc2626 100%);
-        }
-        
-        .stat-icon {
-            font-size: 2.5rem;
-            margin-bottom: 15px;
-            opacity: 0.9;
-        }
-        
-        .stat-value-lg {
-            font-size: 2.5rem;
-            font-weight: 800;
-            margin-bottom: 5px;
-        }
-        
-        .stat-label {
-            font-size: 0.9rem;
-            opacity: 0.9;
-        }
-        
-        .quick-actions {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            margin-bottom: 40px;
-        }
-        
-        .action-btn {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: center;
-            padding: 30px 20px;
-            background: white;
-            border: 2px solid var(--gray-light);
-            border-radius: 16px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            text-decoration: none;
-            color: var(--dark);
-        }
-        
-        .action-btn:hover {
-            transform: translateY(-5px);
-            border-color: var(--primary);
-            box-shadow: 0 10px 25px rgba(0, 0, 0, 0.1);
-        }
-        
-        .action-btn i {
-            font-size: 2.5rem;
-            margin-bottom: 15px;
-            color: var(--primary);
-        }
-        
-        .action-btn span {
-            font-weight: 600;
-            font-size: 1.1rem;
-        }
-        
-        /* Email Generator */
-        .generator-card {
-            background: white;
-            border-radius: 16px;
-            padding: 40px;
-            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.08);
-            margin-bottom: 30px;
-        }
-        
-        .email-display-large {
-            background: linear-gradient(135deg, #f0f4ff 0%, #e0e7ff 100%);
-            border-radius: 12px;
-            padding: 30px;
-            text-align: center;
-            margin-bottom: 30px;
-            border: 3px dashed #c7d2fe;
-        }
-        
-        .current-email {
-            font-size: 2.2rem;
-            font-weight: 800;
-            color: var(--primary-dark);
-            margin: 20px 0;
-            word-break: break-all;
-            padding: 20px;
-            background: white;
-            border-radius: 12px;
-            border: 2px solid #e0e7ff;
-        }
-        
-        .controls-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            margin-top: 30px;
-        }
-        
-        .control-btn {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            padding: 25px 15px;
-            background: white;
-            border: 2px solid var(--gray-light);
-            border-radius: 12px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-        
-        .control-btn:hover {
-            transform: translateY(-3px);
-            box-shadow: 0 8px 20px rgba(0, 0, 0, 0.1);
-        }
-        
-        .control-btn.primary {
-            border-color: var(--primary);
-            background: linear-gradient(135deg, #e0e7ff 0%, #c7d2fe 100%);
-        }
-        
-        .control-btn.secondary {
-            border-color: var(--secondary);
-            background: linear-gradient(135deg, #d1fae5 0%, #a7f3d0 100%);
-        }
-        
-        .control-btn.warning {
-            border-color: var(--warning);
-            background: linear-gradient(135deg, #fef3c7 0%, #fde68a 100%);
-        }
-        
-        .control-btn i {
-            font-size: 2rem;
-            margin-bottom: 15px;
-        }
-        
-        .control-btn.primary i { color: var(--primary); }
-        .control-btn.secondary i { color: var(--secondary); }
-        .control-btn.warning i { color: var(--warning); }
-        .control-btn.danger i { color: var(--danger); }
-        
-        .control-label {
-            font-weight: 600;
-            font-size: 1.1rem;
-            margin-bottom: 5px;
-        }
-        
-        .control-desc {
-            font-size: 0.85rem;
-            opacity: 0.7;
-            text-align: center;
-        }
-        
-        /* Inbox */
-        .inbox-controls {
-            display: flex;
-            gap: 15px;
-            margin-bottom: 25px;
-            flex-wrap: wrap;
-        }
-        
-        .inbox-btn {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            padding: 12px 24px;
-            background: white;
-            border: 2px solid var(--gray-light);
-            border-radius: 10px;
-            cursor: pointer;
-            font-weight: 600;
-            transition: all 0.3s ease;
-        }
-        
-        .inbox-btn:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(0, 0, 0, 0.1);
-        }
-        
-        .inbox-btn.refresh {
-            border-color: var(--primary);
-            color: var(--primary);
-        }
-        
-        .inbox-btn.mark-all {
-            border-color: var(--secondary);
-            color: var(--secondary);
-        }
-        
-        .inbox-btn.export {
-            border-color: var(--warning);
-            color: var(--warning);
-        }
-        
-        .inbox-btn.delete-all {
-            border-color: var(--danger);
-            color: var(--danger);
-        }
-        
-        .messages-list {
-            max-height: 600px;
-            overflow-y: auto;
-            border-radius: 12px;
-            border: 2px solid var(--gray-light);
-        }
-        
-        .message-item {
-            padding: 25px;
-            border-bottom: 1px solid var(--gray-light);
-            background: white;
-            transition: all 0.3s ease;
-            position: relative;
-        }
-        
-        .message-item:hover {
-            background: #f9fafb;
-            transform: translateX(5px);
-        }
-        
-        .message-item.unread {
-            border-left: 4px solid var(--primary);
-            background: #f0f9ff;
-        }
-        
-        .message-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: flex-start;
-            margin-bottom: 15px;
-        }
-        
-        .message-sender {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            font-weight: 700;
-            color: var(--dark);
-            font-size: 1.1rem;
-        }
-        
-        .message-sender i {
-            color: var(--primary);
-        }
-        
-        .message-time {
-            color: var(--gray);
-            font-size: 0.9rem;
-            white-space: nowrap;
-        }
-        
-        .message-subject {
-            font-weight: 600;
-            font-size: 1.2rem;
-            color: var(--dark);
-            margin-bottom: 10px;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }
-        
-        .message-preview {
-            color: var(--gray);
-            line-height: 1.6;
-            margin-bottom: 15px;
-        }
-        
-        .message-actions {
-            display: flex;
-            gap: 10px;
-            opacity: 0;
-            transition: opacity 0.3s ease;
-        }
-        
-        .message-item:hover .message-actions {
-            opacity: 1;
-        }
-        
-        .msg-action-btn {
-            padding: 6px 12px;
-            border: none;
-            border-radius: 6px;
-            font-size: 0.85rem;
-            cursor: pointer;
-            display: flex;
-            align-items: center;
-            gap: 5px;
-        }
-        
-        .msg-action-btn.read {
-            background: var(--secondary);
-            color: white;
-        }
-        
-        .msg-action-btn.view {
-            background: var(--primary);
-            color: white;
-        }
-        
-        .msg-action-btn.delete {
-            background: var(--danger);
-            color: white;
-        }
-        
-        /* History */
-        .sessions-list {
-            display: grid;
-            gap: 20px;
-        }
-        
-        .session-card {
-            background: white;
-            border-radius: 12px;
-            padding: 25px;
-            border: 2px solid var(--gray-light);
-            transition: all 0.3s ease;
-        }
-        
-        .session-card:hover {
-            border-color: var(--primary);
-            box-shadow: 0 10px 25px rgba(0, 0, 0, 0.1);
-        }
-        
-        .session-card.active {
-            border-color: var(--secondary);
-            background: #f0fdf4;
-        }
-        
-        .session-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 15px;
-        }
-        
-        .session-email-small {
-            font-weight: 600;
-            color: var(--dark);
-            word-break: break-all;
-        }
-        
-        .session-status {
-            padding: 5px 15px;
-            border-radius: 20px;
-            font-size: 0.85rem;
-            font-weight: 600;
-        }
-        
-        .session-status.active {
-            background: var(--secondary);
-            color: white;
-        }
-        
-        .session-status.inactive {
-            background: var(--gray);
-            color: white;
-        }
-        
-        .session-stats-small {
-            display: grid;
-            grid-template-columns: repeat(4, 1fr);
-            gap: 15px;
-            margin-top: 15px;
-            padding-top: 15px;
-            border-top: 1px solid var(--gray-light);
-        }
-        
-        .session-stat {
-            text-align: center;
-        }
-        
-        .session-stat-value {
-            font-weight: 700;
-            font-size: 1.2rem;
-            color: var(--primary);
-        }
-        
-        .session-stat-label {
-            font-size: 0.8rem;
-            color: var(--gray);
-        }
-        
-        /* Settings & Export */
-        .settings-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 30px;
-        }
-        
-        .settings-card {
-            background: white;
-            border-radius: 12px;
-            padding: 30px;
-            border: 2px solid var(--gray-light);
-        }
-        
-        .settings-card h3 {
-            display: flex;
-            align-items: center;
-            gap: 10px;
-            margin-bottom: 20px;
-            color: var(--dark);
-        }
-        
-        .settings-card h3 i {
-            color: var(--primary);
-        }
-        
-        .form-group {
-            margin-bottom: 20px;
-        }
-        
-        .form-group label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 500;
-            color: var(--dark);
-        }
-        
-        .form-control {
-            width: 100%;
-            padding: 12px 15px;
-            border: 2px solid var(--gray-light);
-            border-radius: 8px;
-            font-size: 1rem;
-            transition: border-color 0.3s ease;
-        }
-        
-        .form-control:focus {
-            outline: none;
-            border-color: var(--primary);
-        }
-        
-        .export-options {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-            gap: 15px;
-            margin-top: 20px;
-        }
-        
-        .export-option {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            padding: 20px;
-            border: 2px solid var(--gray-light);
-            border-radius: 10px;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-        
-        .export-option:hover {
-            transform: translateY(-3px);
-            border-color: var(--primary);
-        }
-        
-        .export-option i {
-            font-size: 2rem;
-            margin-bottom: 10px;
-            color: var(--primary);
-        }
-        
-        /* Footer */
-        .footer {
-            text-align: center;
-            padding: 20px;
-            color: var(--gray);
-            font-size: 0.9rem;
-            border-top: 1px solid var(--gray-light);
-            margin-top: 40px;
-        }
-        
-        /* Responsive */
-        @media (max-width: 1024px) {
-            .app-container {
-                flex-direction: column;
-                margin: 10px;
-            }
-            
-            .sidebar {
-                width: 100%;
-                padding: 20px;
-            }
-            
-            .nav-menu {
-                display: flex;
-                overflow-x: auto;
-                padding-bottom: 10px;
-            }
-            
-            .nav-item {
-                margin-bottom: 0;
-                margin-right: 10px;
-            }
-            
-            .nav-link {
-                white-space: nowrap;
-            }
-        }
-        
-        @media (max-width: 768px) {
-            .main-content {
-                padding: 20px;
-            }
-            
-            .stats-grid {
-                grid-template-columns: 1fr;
-            }
-            
-            .quick-actions {
-                grid-template-columns: 1fr;
-            }
-            
-            .current-email {
-                font-size: 1.5rem;
-            }
-            
-            .controls-grid {
-                grid-template-columns: 1fr;
-            }
-            
-            .session-stats-small {
-                grid-template-columns: repeat(2, 1fr);
-            }
-        }
-        
-        .loading {
-            display: none;
-            text-align: center;
-            padding: 40px;
-        }
-        
-        .loading-spinner {
-            width: 50px;
-            height: 50px;
-            border: 4px solid #f3f3f3;
-            border-top: 4px solid var(--primary);
-            border-radius: 50%;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 20px;
-        }
-        
-        @keyframes spin {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-    </style>
-</head>
-<body>
-    <div class="app-container">
-        <!-- Sidebar Navigation -->
-        <div class="sidebar">
-            <div class="logo">
-                <div class="logo-icon">
-                    <i class="fas fa-mail-bulk"></i>
-                </div>
-                <div class="logo-text">
-                    <h1>TempMail Pro</h1>
-                    <p>Control Center v2.0</p>
-                </div>
-            </div>
-            
-            <ul class="nav-menu">
-                <li class="nav-item">
-                    <a href="#" class="nav-link active" data-section="dashboard">
-                        <i class="fas fa-tachometer-alt"></i>
-                        <span>Dashboard</span>
-                    </a>
-                </li>
-                <li class="nav-item">
-                    <a href="#" class="nav-link" data-section="generator">
-                        <i class="fas fa-envelope"></i>
-                        <span>Email Generator</span>
-                    </a>
-                </li>
-                <li class="nav-item">
-                    <a href="#" class="nav-link" data-section="inbox">
-                        <i class="fas fa-inbox"></i>
-                        <span>Inbox</span>
-                        <span class="badge" id="unreadBadge" style="margin-left: auto; background: var(--secondary); color: white; padding: 2px 8px; border-radius: 10px; font-size: 0.8rem;">0</span>
-                    </a>
-                </li>
-                <li class="nav-item">
-                    <a href="#" class="nav-link" data-section="history">
-                        <i class="fas fa-history"></i>
-                        <span>Session History</span>
-                    </a>
-                </li>
-                <li class="nav-item">
-                    <a href="#" class="nav-link" data-section="export">
-                        <i class="fas fa-download"></i>
-                        <span>Export & Settings</span>
-                    </a>
-                </li>
-            </ul>
-            
-            <div class="session-info">
-                <h3>Current Session</h3>
-                <div class="session-email" id="sidebarEmail">No active session</div>
-                <div class="session-stats">
-                    <div class="stat-item">
-                        <div class="stat-value" id="sidebarTotal">0</div>
-                        <div>Total</div>
-                    </div>
-                    <div class="stat-item">
-                        <div class="stat-value" id="sidebarUnread">0</div>
-                        <div>Unread</div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <!-- Main Content -->
-        <div class="main-content">
-            <!-- Dashboard Section -->
-            <div class="content-section active" id="dashboard">
-                <div class="section-header">
-                    <div class="section-title">
-                        <i class="fas fa-tachometer-alt"></i>
-                        <span>Dashboard Overview</span>
-                    </div>
-                    <div style="display: flex; gap: 10px;">
-                        <button class="inbox-btn refresh" onclick="checkAllSessions()">
-                            <i class="fas fa-sync-alt"></i> Refresh All
-                        </button>
-                    </div>
-                </div>
-                
-                <div class="stats-grid">
-                    <div class="stat-card">
-                        <div class="stat-icon">
-                            <i class="fas fa-envelope"></i>
-                        </div>
-                        <div class="stat-value-lg" id="statTotalMessages">0</div>
-                        <div class="stat-label">Total Messages</div>
-                    </div>
-                    <div class="stat-card secondary">
-                        <div class="stat-icon">
-                            <i class="fas fa-envelope-open"></i>
-                        </div>
-                        <div class="stat-value-lg" id="statUnreadMessages">0</div>
-                        <div class="stat-label">Unread Messages</div>
-                    </div>
-                    <div class="stat-card warning">
-                        <div class="stat-icon">
-                            <i class="fas fa-clock"></i>
-                        </div>
-                        <div class="stat-value-lg" id="statActiveSessions">0</div>
-                        <div class="stat-label">Active Sessions</div>
-                    </div>
-                    <div class="stat-card danger">
-                        <div class="stat-icon">
-                            <i class="fas fa-trash"></i>
-                        </div>
-                        <div class="stat-value-lg" id="statDeleted">0</div>
-                        <div class="stat-label">Messages Deleted</div>
-                    </div>
-                </div>
-                
-                <h3 style="margin: 30px 0 20px 0; color: var(--dark);">Quick Actions</h3>
-                <div class="quick-actions">
-                    <a href="#" class="action-btn" onclick="switchSection('generator')">
-                        <i class="fas fa-plus-circle"></i>
-                        <span>Generate New Email</span>
-                    </a>
-                    <a href="#" class="action-btn" onclick="switchSection('inbox')">
-                        <i class="fas fa-inbox"></i>
-                        <span>Check Inbox</span>
-                    </a>
-                    <a href="#" class="action-btn" onclick="exportData('json')">
-                        <i class="fas fa-file-export"></i>
-                        <span>Export Data</span>
-                    </a>
-                    <a href="#" class="action-btn" onclick="clearAllSessions()">
-                        <i class="fas fa-trash-alt"></i>
-                        <span>Cleanup All</span>
-                    </a>
-                </div>
-            </div>
-            
-            <!-- Email Generator Section -->
-            <div class="content-section" id="generator">
-                <div class="section-header">
-                    <div class="section-title">
-                        <i class="fas fa-envelope"></i>
-                        <span>Email Generator</span>
-                    </div>
-                </div>
-                
-                <div class="generator-card">
-                    <div class="email-display-large">
-                        <div class="loading" id="generatorLoading">
-                            <div class="loading-spinner"></div>
-                            <p>Generating secure email...</p>
-                        </div>
-                        <div id="emailDisplay">
-                            <p style="color: var(--gray); margin-bottom: 15px;">Generate a fresh temporary email address</p>
-                            <div class="current-email" id="currentEmailDisplay">Not generated yet</div>
-                            <div id="emailInfo" style="margin-top: 15px; font-size: 0.9rem; color: var(--gray);">
-                                <span id="emailStatus">Ready to generate</span>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="controls-grid">
-                        <div class="control-btn primary" onclick="generateEmail('standard')">
-                            <i class="fas fa-bolt"></i>
-                            <div class="control-label">Quick Generate</div>
-                            <div class="control-desc">Standard random email</div>
-                        </div>
-                        
-                        <div class="control-btn secondary" onclick="generateEmail('custom')">
-                            <i class="fas fa-magic"></i>
-                            <div class="control-label">Custom Prefix</div>
-                            <div class="control-desc">Add your own prefix</div>
-                        </div>
-                        
-                        <div class="control-btn warning" onclick="copyCurrentEmail()">
-                            <i class="fas fa-copy"></i>
-                            <div class="control-label">Copy Email</div>
-                            <div class="control-desc">Copy to clipboard</div>
-                        </div>
-                        
-                        <div class="control-btn danger" onclick="deleteCurrentSession()">
-                            <i class="fas fa-trash"></i>
-                            <div class="control-label">Delete Session</div>
-                            <div class="control-desc">Clear current email</div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- Inbox Section -->
-            <div class="content-section" id="inbox">
-                <div class="section-header">
-                    <div class="section-title">
-                        <i class="fas fa-inbox"></i>
-                        <span>Inbox Manager</span>
-                    </div>
-                    <div style="display: flex; gap: 10px; align-items: center;">
-                        <span id="lastCheckTime" style="font-size: 0.9rem; color: var(--gray);">Never checked</span>
-                    </div>
-                </div>
-                
-                <div class="inbox-controls">
-                    <button class="inbox-btn refresh" onclick="refreshInbox()">
-                        <i class="fas fa-sync-alt"></i> Refresh
-                    </button>
-                    <button class="inbox-btn mark-all" onclick="markAllAsRead()">
-                        <i class="fas fa-check-double"></i> Mark All Read
-                    </button>
-                    <button class="inbox-btn export" onclick="showExportOptions()">
-                        <i class="fas fa-file-export"></i> Export
-                    </button>
-                    <button class="inbox-btn delete-all" onclick="deleteAllMessages()">
-                        <i class="fas fa-trash-alt"></i> Delete All
-                    </button>
-                </div>
-                
-                <div class="messages-list" id="messagesList">
-                    <div class="loading" id="inboxLoading">
-                        <div class="loading-spinner"></div>
-                        <p>Loading messages...</p>
-                    </div>
-                    <div id="messagesContainer">
-                        <!-- Messages will be loaded here -->
-                    </div>
-                </div>
-            </div>
-            
-            <!-- History Section -->
-            <div class="content-section" id="history">
-                <div class="section-header">
-                    <div class="section-title">
-                        <i class="fas fa-history"></i>
-                        <span>Session History</span>
-                    </div>
-                    <button class="inbox-btn refresh" onclick="loadHistory()">
-                        <i class="fas fa-sync-alt"></i> Refresh
-                    </button>
-                </div>
-                
-                <div class="sessions-list" id="sessionsList">
-                    <div class="loading" id="historyLoading">
-                        <div class="loading-spinner"></div>
-                        <p>Loading session history...</p>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- Export & Settings Section -->
-            <div class="content-section" id="export">
-                <div class="section-header">
-                    <div class="section-title">
-                        <i class="fas fa-download"></i>
-                        <span>Export & Settings</span>
-                    </div>
-                </div>
-                
-                <div class="settings-grid">
-                    <div class="settings-card">
-                        <h3><i class="fas fa-file-export"></i> Export Data</h3>
-                        <p style="margin-bottom: 20px; color: var(--gray);">Export your messages in various formats.</p>
-                        
-                        <div class="export-options">
-                            <div class="export-option" onclick="exportData('json')">
-                                <i class="fas fa-code"></i>
-                                <div>JSON</div>
-                            </div>
-                            <div class="export-option" onclick="exportData('csv')">
-                                <i class="fas fa-file-csv"></i>
-                                <div>CSV</div>
-                            </div>
-                            <div class="export-option" onclick="exportData('txt')">
-                                <i class="fas fa-file-alt"></i>
-                                <div>Text</div>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="settings-card">
-                        <h3><i class="fas fa-cog"></i> Settings</h3>
-                        
-                        <div class="form-group">
-                            <label for="autoRefresh">Auto-refresh Interval (seconds)</label>
-                            <select class="form-control" id="autoRefresh">
-                                <option value="0">Disabled</option>
-                                <option value="5">5 seconds</option>
-                                <option value="10" selected>10 seconds</option>
-                                <option value="30">30 seconds</option>
-                                <option value="60">1 minute</option>
-                            </select>
-                        </div>
-                        
-                        <div class="form-group">
-                            <label for="maxMessages">Max Messages per Load</label>
-                            <select class="form-control" id="maxMessages">
-                                <option value="10">10</option>
-                                <option value="25" selected>25</option>
-                                <option value="50">50</option>
-                                <option value="100">100</option>
-                            </select>
-                        </div>
-                        
-                        <button class="inbox-btn" style="width: 100%; margin-top: 10px;" onclick="saveSettings()">
-                            <i class="fas fa-save"></i> Save Settings
-                        </button>
-                    </div>
-                </div>
-                
-                <div class="settings-card" style="margin-top: 30px;">
-                    <h3><i class="fas fa-database"></i> Database Management</h3>
-                    <p style="margin-bottom: 20px; color: var(--gray);">Manage your local database and sessions.</p>
-                    
-                    <div style="display: flex; gap: 10px; flex-wrap: wrap;">
-                        <button class="inbox-btn warning" onclick="clearDatabase()">
-                            <i class="fas fa-eraser"></i> Clear All Data
-                        </button>
-                        <button class="inbox-btn danger" onclick="deleteInactiveSessions()">
-                            <i class="fas fa-trash"></i> Delete Inactive
-                        </button>
-                        <button class="inbox-btn" onclick="downloadDatabase()">
-                            <i class="fas fa-download"></i> Backup DB
-                        </button>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="footer">
-                <p>TempMail Control Center v2.0 • Secure Temporary Email Service</p>
-                <p style="font-size: 0.8rem; margin-top: 5px; opacity: 0.7;">All data is stored locally in your browser and database</p>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        // Global variables
-        let currentSession = null;
-        let currentEmail = null;
-        let autoRefreshInterval = null;
-        let settings = {
-            autoRefresh: 10,
-            maxMessages: 25
-        };
-        
-        // Load settings from localStorage
-        function loadSettings() {
-            const saved = localStorage.getItem('tempmail_settings');
-            if (saved) {
-                settings = JSON.parse(saved);
-                document.getElementById('autoRefresh').value = settings.autoRefresh;
-                document.getElementById('maxMessages').value = settings.maxMessages;
-                setupAutoRefresh();
-            }
-        }
-        
-        function saveSettings() {
-            settings.autoRefresh = parseInt(document.getElementById('autoRefresh').value);
-            settings.maxMessages = parseInt(document.getElementById('maxMessages').value);
-            localStorage.setItem('tempmail_settings', JSON.stringify(settings));
-            setupAutoRefresh();
-            showNotification('Settings saved successfully!', 'success');
-        }
-        
-        function setupAutoRefresh() {
-            if (autoRefreshInterval) {
-                clearInterval(autoRefreshInterval);
-            }
-            
-            if (settings.autoRefresh > 0 && currentSession) {
-                autoRefreshInterval = setInterval(refreshInbox, settings.autoRefresh * 1000);
-            }
-        }
-        
-        // Navigation
-        function switchSection(sectionId) {
-            // Update active nav link
-            document.querySelectorAll('.nav-link').forEach(link => {
-                link.classList.remove('active');
-                if (link.dataset.section === sectionId) {
-                    link.classList.add('active');
-                }
-            });
-            
-            // Show corresponding section
-            document.querySelectorAll('.content-section').forEach(section => {
-                section.classList.remove('active');
-                if (section.id === sectionId) {
-                    section.classList.add('active');
-                }
-            });
-            
-            // Load section data
-            if (sectionId === 'inbox' && currentSession) {
-                loadInbox();
-            } else if (sectionId === 'history') {
-                loadHistory();
-            } else if (sectionId === 'dashboard') {
-                updateDashboard();
-            }
-        }
-        
-        document.querySelectorAll('.nav-link').forEach(link => {
-            link.addEventListener('click', function(e) {
-                e.preventDefault();
-                switchSection(this.dataset.section);
-            });
-        });
-        
-        // Email Generation
-        function generateEmail(type = 'standard') {
-            if (type === 'custom') {
-                Swal.fire({
-                    title: 'Custom Email Prefix',
-                    input: 'text',
-                    inputLabel: 'Enter a prefix for your email',
-                    inputPlaceholder: 'e.g., myprefix',
-                    showCancelButton: true,
-                    confirmButtonText: 'Generate',
-                    preConfirm: (prefix) => {
-                        if (!prefix) {
-                            Swal.showValidationMessage('Please enter a prefix');
-                            return false;
-                        }
-                        return prefix;
-                    }
-                }).then((result) => {
-                    if (result.isConfirmed) {
-                        performEmailGeneration(result.value);
-                    }
-                });
-            } else {
-                performEmailGeneration();
-            }
-        }
-        
-        function performEmailGeneration(customPrefix = null) {
-            const loading = document.getElementById('generatorLoading');
-            const display = document.getElementById('emailDisplay');
-            
-            loading.style.display = 'block';
-            display.style.display = 'none';
-            
-            let requestData = { type: 'standard' };
-            if (customPrefix) {
-                requestData = { type: 'custom', prefix: customPrefix };
-            }
-            
-            fetch('/generate-email', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(requestData)
-            })
-            .then(response => response.json())
-            .then(data => {
-                loading.style.display = 'none';
-                display.style.display = 'block';
-                
-                if (data.success) {
-                    currentSession = data.session_id;
-                    currentEmail = data.email;
-                    
-                    document.getElementById('currentEmailDisplay').textContent = currentEmail;
-                    document.getElementById('emailStatus').textContent = `Generated ${new Date().toLocaleTimeString()}`;
-                    document.getElementById('sidebarEmail').textContent = currentEmail;
-                    
-                    // Update session info
-                    updateSessionInfo();
-                    
-                    // Start auto-refresh if enabled
-                    setupAutoRefresh();
-                    
-                    showNotification('New email generated successfully!', 'success');
-                    
-                    // Switch to inbox after generation
-                    setTimeout(() => switchSection('inbox'), 500);
-                } else {
-                    showNotification('Failed to generate email: ' + (data.error || 'Unknown error'), 'error');
-                }
-            })
-            .catch(error => {
-                loading.style.display = 'none';
-                display.style.display = 'block';
-                showNotification('Network error: ' + error.message, 'error');
-            });
-        }
-        
-        function copyCurrentEmail() {
-            if (!currentEmail) {
-                showNotification('No email to copy', 'warning');
-                return;
-            }
-            
-            navigator.clipboard.writeText(currentEmail).then(() => {
-                showNotification('Email copied to clipboard!', 'success');
-            }).catch(err => {
-                showNotification('Failed to copy: ' + err, 'error');
-            });
-        }
-        
-        function deleteCurrentSession() {
-            if (!currentSession) {
-                showNotification('No active session', 'warning');
-                return;
-            }
-            
-            Swal.fire({
-                title: 'Delete Session?',
-                text: 'This will remove all messages for this email',
-                icon: 'warning',
-                showCancelButton: true,
-                confirmButtonColor: '#d33',
-                cancelButtonColor: '#3085d6',
-                confirmButtonText: 'Yes, delete it!'
-            }).then((result) => {
-                if (result.isConfirmed) {
-                    fetch('/delete-session', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ session_id: currentSession })
-                    })
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.success) {
-                            currentSession = null;
-                            currentEmail = null;
-                            document.getElementById('currentEmailDisplay').textContent = 'Not generated yet';
-                            document.getElementById('sidebarEmail').textContent = 'No active session';
-                            document.getElementById('sidebarTotal').textContent = '0';
-                            document.getElementById('sidebarUnread').textContent = '0';
-                            document.getElementById('unreadBadge').textContent = '0';
-                            showNotification('Session deleted successfully', 'success');
-                            switchSection('dashboard');
-                        }
-                    });
-                }
-            });
-        }
-        
-        // Inbox Management
-        function loadInbox() {
-            if (!currentSession) {
-                document.getElementById('messagesContainer').innerHTML = `
-                    <div style="text-align: center; padding: 40px; color: var(--gray);">
-                        <i class="fas fa-envelope" style="font-size: 3rem; margin-bottom: 15px; opacity: 0.5;"></i>
-                        <p>Generate an email first to view messages</p>
-                    </div>
-                `;
-                return;
-            }
-            
-            const loading = document.getElementById('inboxLoading');
-            const container = document.getElementById('messagesContainer');
-            
-            loading.style.display = 'block';
-            container.style.display = 'none';
-            
-            fetch('/get-messages', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ 
-                    session_id: currentSession,
-                    limit: settings.maxMessages,
-                    offset: 0
-                })
-            })
-            .then(response => response.json())
-            .then(data => {
-                loading.style.display = 'none';
-                container.style.display = 'block';
-                
-                if (data.success) {
-                    displayMessages(data.messages);
-                    updateLastCheckTime();
-                    updateSessionInfo();
-                }
-            })
-            .catch(error => {
-                loading.style.display = 'none';
-                container.style.display = 'block';
-                showNotification('Error loading messages: ' + error.message, 'error');
-            });
-        }
-        
-        function refreshInbox() {
-            if (!currentSession) {
-                showNotification('No active session', 'warning');
-                return;
-            }
-            
-            document.getElementById('lastCheckTime').innerHTML = `<i class="fas fa-sync-alt fa-spin"></i> Checking...`;
-            
-            fetch('/check-inbox', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ 
-                    session_id: currentSession,
-                    email: currentEmail 
-                })
-            })
-            .then(response => response.json())
-            .then(data => {
-                updateLastCheckTime();
-                if (data.success) {
-                    loadInbox();
-                    if (data.new_count > 0) {
-                        showNotification(`${data.new_count} new message(s) received!`, 'info');
-                    }
-                }
-            });
-        }
-        
-        function displayMessages(messages) {
-            const container = document.getElementById('messagesContainer');
-            
-            if (!messages || messages.length === 0) {
-                container.innerHTML = `
-                    <div style="text-align: center; padding: 40px; color: var(--gray);">
-                        <i class="fas fa-inbox" style="font-size: 3rem; margin-bottom: 15px; opacity: 0.5;"></i>
-                        <p>No messages yet. Send emails to your address to see them here.</p>
-                    </div>
-                `;
-                return;
-            }
-            
-            let html = '';
-            messages.forEach(msg => {
-                const time = new Date(msg.time).toLocaleString();
-                const unreadClass = msg.is_read ? '' : 'unread';
-                const readIcon = msg.is_read ? 'fa-envelope-open' : 'fa-envelope';
-                
-                html += `
-                    <div class="message-item ${unreadClass}" data-id="${msg.id}">
-                        <div class="message-header">
-                            <div class="message-sender">
-                                <i class="fas fa-user"></i>
-                                ${escapeHtml(msg.sender || 'Unknown Sender')}
-                            </div>
-                            <div class="message-time">${time}</div>
-                        </div>
-                        <div class="message-subject">
-                            <i class="fas ${readIcon}"></i>
-                            ${escapeHtml(msg.subject || 'No Subject')}
-                        </div>
-                        <div class="message-preview">
-                            ${escapeHtml(msg.preview || 'No preview available')}
-                        </div>
-                        <div class="message-actions">
-                            ${!msg.is_read ? `
-                                <button class="msg-action-btn read" onclick="markAsRead('${msg.id}')">
-                                    <i class="fas fa-check"></i> Mark Read
-                                </button>
-                            ` : ''}
-                            <button class="msg-action-btn view" onclick="viewMessage('${msg.id}')">
-                                <i class="fas fa-eye"></i> View
-                            </button>
-                            <button class="msg-action-btn delete" onclick="deleteMessage('${msg.id}')">
-                                <i class="fas fa-trash"></i> Delete
-                            </button>
-                        </div>
-                    </div>
-                `;
-            });
-            
-            container.innerHTML = html;
-        }
-        
-        function markAsRead(messageId) {
-            fetch('/mark-read', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ 
-                    session_id: currentSession,
-                    message_id: messageId 
-                })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    const msgElement = document.querySelector(`[data-id="${messageId}"]`);
-                    if (msgElement) {
-                        msgElement.classList.remove('unread');
-                        msgElement.querySelector('.message-subject i').className = 'fas fa-envelope-open';
-                        msgElement.querySelector('.message-actions').innerHTML = `
-                            <button class="msg-action-btn view" onclick="viewMessage('${messageId}')">
-                                <i class="fas fa-eye"></i> View
-                            </button>
-                            <button class="msg-action-btn delete" onclick="deleteMessage('${messageId}')">
-                                <i class="fas fa-trash"></i> Delete
-                            </button>
-                        `;
-                    }
-                    updateSessionInfo();
-                }
-            });
-        }
-        
-        function viewMessage(messageId) {
-            fetch('/get-message', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ 
-                    session_id: currentSession,
-                    message_id: messageId 
-                })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    Swal.fire({
-                        title: data.message.subject || 'No Subject',
-                        html: `
-                            <div style="text-align: left;">
-                                <p><strong>From:</strong> ${escapeHtml(data.message.sender)}</p>
-                                <p><strong>To:</strong> ${escapeHtml(data.message.recipient)}</p>
-                                <p><strong>Time:</strong> ${new Date(data.message.time).toLocaleString()}</p>
-                                <hr>
-                                <div style="max-height: 300px; overflow-y: auto; background: #f5f5f5; padding: 15px; border-radius: 5px; margin-top: 15px;">
-                                    <pre style="white-space: pre-wrap; font-family: inherit;">${escapeHtml(data.message.content)}</pre>
-                                </div>
-                            </div>
-                        `,
-                        width: '800px',
-                        showCloseButton: true,
-                        showConfirmButton: false
-                    });
-                    
-                    // Mark as read when viewed
-                    markAsRead(messageId);
-                }
-            });
-        }
+def get_inbox(email, session_id):
+    """Get inbox messages with enhanced parsing"""
+    try:
+        response = HTTP.post(
+            "https://api.emailnator.com/api/email/inbox",
+            json={"email": email},
+            timeout=20
+        )
         
-        function deleteMessage(messageId) {
-            Swal.fire({
-                title: 'Delete Message?',
-                text: 'This action cannot be undone',
-                icon: 'warning',
-                showCancelButton: true,
-                confirmButtonColor: '#d33',
-                cancelButtonColor: '#3085d6',
-                confirmButtonText: 'Delete'
-            }).then((result) => {
-                if (result.isConfirmed) {
-                    fetch('/delete-message', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ 
-                            session_id: currentSession,
-                            message_id: messageId 
-                        })
-                    })
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.success) {
-                            const msgElement = document.querySelector(`[data-id="${messageId}"]`);
-                            if (msgElement) {
-                                msgElement.style.opacity = '0';
-                                setTimeout(() => msgElement.remove(), 300);
-                            }
-                            updateSessionInfo();
-                            showNotification('Message deleted', 'success');
-                        }
-                    });
-                }
-            });
-        }
+        if response.status_code != 200:
+            return {'messages': [], 'status': 'error', 'code': response.status_code}
         
-        function markAllAsRead() {
-            if (!currentSession) return;
-            
-            fetch('/mark-all-read', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ session_id: currentSession })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    document.querySelectorAll('.message-item.unread').forEach(item => {
-                        item.classList.remove('unread');
-                        item.querySelector('.message-subject i').className = 'fas fa-envelope-open';
-                    });
-                    updateSessionInfo();
-                    showNotification('All messages marked as read', 'success');
-                }
-            });
-        }
+        data = response.json()
         
-        function deleteAllMessages() {
-            if (!currentSession) return;
-            
-            Swal.fire({
-                title: 'Delete All Messages?',
-                text: 'This will remove all messages for this session',
-                icon: 'warning',
-                showCancelButton: true,
-                confirmButtonColor: '#d33',
-                cancelButtonColor: '#3085d6',
-                confirmButtonText: 'Delete All'
-            }).then((result) => {
-                if (result.isConfirmed) {
-                    fetch('/delete-all-messages', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ session_id: currentSession })
-                    })
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.success) {
-                            document.getElementById('messagesContainer').innerHTML = `
-                                <div style="text-align: center; padding: 40px; color: var(--gray);">
-                                    <i class="fas fa-inbox" style="font-size: 3rem; margin-bottom: 15px; opacity: 0.5;"></i>
-                                    <p>All messages have been deleted</p>
-                                </div>
-                            `;
-                            updateSessionInfo();
-                            showNotification('All messages deleted', 'success');
-                        }
-                    });
-                }
-            });
-        }
+        # Store messages in database; wait for the writer so the counts
+        # check-inbox reports include this batch
+        if data.get('messages'):
+            stored = store_messages_in_db(data['messages'], session_id, email)
+            stored.wait(timeout=WRITE_WAIT_TIMEOUT)
+            if stored.error is not None:
+                return {'messages': [], 'status': 'error', 'error': f'Could not store messages: {stored.error}'}
         
-        // Session History
-        function loadHistory() {
-            const loading = document.getElementById('historyLoading');
-            const container = document.getElementById('sessionsList');
+        return data
+    except Exception as e:
+        print(f"Error fetching inbox: {e}")
+        return {'messages': [], 'status': 'error', 'error': str(e)}
+
+def as_text(value, default):
+    """A field value as a string sqlite3 can bind, or default if it is missing"""
+    return default if value is None else str(value)
+
+def parse_message_rows(messages, session_id, recipient_email):
+    """Turn raw inbox messages into rows for the messages table"""
+    rows = []
+    for msg in messages:
+        try:
+            # Extract message data
+            sender = 'Unknown'
+            subject = 'No Subject'
+            body_preview = 'No preview'
+            full_content = str(msg)
+            received_time = now_ms()
             
-            loading.style.display = 'block';
+            if isinstance(msg, str):
+                lines = msg.strip().split('\n')
+                if len(lines) >= 3:
+                    sender = lines[0].replace('NEW', '').strip()
+                    subject = lines[2].strip() if len(lines) > 2 else 'No Subject'
+                    body_preview = lines[3].strip() if len(lines) > 3 else 'No preview'
+            elif isinstance(msg, dict):
+                sender = as_text(msg.get('sender'), 'Unknown')
+                subject = as_text(msg.get('subject'), 'No Subject')
+                body_preview = as_text(msg.get('preview'), 'No preview')
+                if 'text' in msg and isinstance(msg['text'], str):
+                    full_content = msg['text']
             
-            fetch('/get-sessions', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' }
-            })
-            .then(response => response.json())
-            .then(data => {
-                loading.style.display = 'none';
-                
-                if (data.success && data.sessions.length > 0) {
-                    let html = '';
-                    data.sessions.forEach(session => {
-                        const isActive = session.session_id === currentSession;
-                        const created = new Date(session.created_at).toLocaleString();
-                        const lastActive = new Date(session.last_activity).toLocaleString();
-                        
-                        html += `
-                            <div class="session-card ${isActive ? 'active' : ''}">
-                                <div class="session-header">
-                                    <div class="session-email-small">${escapeHtml(session.email)}</div>
-                                    <div class="session-status ${session.is_active ? 'active' : 'inactive'}">
-                                        ${session.is_active ? 'Active' : 'Inactive'}
-                                    </div>
-                                </div>
-                                <div style="color: var(--gray); font-size: 0.9rem; margin: 10px 0;">
-                                    Created: ${created}<br>
-                                    Last active: ${lastActive}
-                                </div>
-                                <div class="session-stats-small">
-                                    <div class="session-stat">
-                                        <div class="session-stat-value">${session.total_messages}</div>
-                                        <div class="session-stat-label">Total</div>
-                                    </div>
-                                    <div class="session-stat">
-                                        <div class="session-stat-value">${session.unread_messages}</div>
-                                        <div class="session-stat-label">Unread</div>
-                                    </div>
-                                    <div class="session-stat">
-                                        <div class="session-stat-value">${session.active ? 'Yes' : 'No'}</div>
-                                        <div class="session-stat-label">Active</div>
-                                    </div>
-                                    <div class="session-stat">
-                                        ${isActive ? `
-                                            <button class="msg-action-btn view" style="padding: 5px 10px; font-size: 0.8rem;" onclick="switchSection('inbox')">
-                                                <i class="fas fa-inbox"></i> Open
-                                            </button>
-                                        ` : `
-                                            <button class="msg-action-btn secondary" style="padding: 5px 10px; font-size: 0.8rem;" onclick="activateSession('${session.session_id}')">
-                                                <i class="fas fa-play"></i> Activate
-                                            </button>
-                                        `}
-                                    </div>
-                                </div>
-                            </div>
-                        `;
-                    });
-                    
-                    container.innerHTML = html;
-                } else {
-                    container.innerHTML = `
-                        <div style="text-align: center; padding: 40px; color: var(--gray);">
-                            <i class="fas fa-history" style="font-size: 3rem; margin-bottom: 15px; opacity: 0.5;"></i>
-                            <p>No session history found</p>
-                        </div>
-                    `;
-                }
-            });
-        }
-        
-        function activateSession(sessionId) {
-            fetch('/activate-session', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ session_id: sessionId })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    currentSession = sessionId;
-                    currentEmail = data.email;
-                    updateSessionInfo();
-                    switchSection('inbox');
-                    showNotification('Session activated', 'success');
-                }
-            });
-        }
-        
-        // Export Functions
-        function exportData(format) {
-            if (!currentSession) {
-                showNotification('No active session to export', 'warning');
-                return;
-            }
+            # Upstream returns the whole inbox on every poll, so the id is
+            # derived from the message itself; repeats then hit the primary key
+            raw = orjson.dumps(msg, option=orjson.OPT_SORT_KEYS) if isinstance(msg, dict) else str(msg).encode()
+            msg_id = hashlib.sha1(session_id.encode() + b'\0' + raw).hexdigest()[:16]
             
-            fetch('/export-messages', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ 
-                    session_id: currentSession,
-                    format: format 
-                })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    const blob = new Blob([data.content], { type: data.mime_type });
-                    const url = window.URL.createObjectURL(blob);
-                    const a = document.createElement('a');
-                    a.href = url;
-                    a.download = `tempmail_export_${new Date().toISOString().split('T')[0]}.${format}`;
-                    document.body.appendChild(a);
-                    a.click();
-                    document.body.removeChild(a);
-                    window.URL.revokeObjectURL(url);
-                    showNotification(`Exported as ${format.toUpperCase()}`, 'success');
-                }
-            });
-        }
-        
-        function showExportOptions() {
-            Swal.fire({
-                title: 'Export Messages',
-                text: 'Choose export format:',
-                showCancelButton: true,
-                showDenyButton: true,
-                showConfirmButton: true,
-                confirmButtonText: 'JSON',
-                denyButtonText: 'CSV',
-                cancelButtonText: 'Text'
-            }).then((result) => {
-                if (result.isConfirmed) {
-                    exportData('json');
-                } else if (result.isDenied) {
-                    exportData('csv');
-                } else if (result.dismiss === Swal.DismissReason.cancel) {
-                    exportData('txt');
-                }
-            });
-        }
-        
-        // Database Management
-        function clearDatabase() {
-            Swal.fire({
-                title: 'Clear All Data?',
-                text: 'This will delete ALL sessions and messages. This action cannot be undone!',
-                icon: 'warning',
-                showCancelButton: true,
-                confirmButtonColor: '#d33',
-                cancelButtonColor: '#3085d6',
-                confirmButtonText: 'Yes, clear everything!'
-            }).then((result) => {
-                if (result.isConfirmed) {
-                    fetch('/clear-database', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' }
-                    })
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.success) {
-                            currentSession = null;
-                            currentEmail = null;
-                            updateSessionInfo();
-                            switchSection('dashboard');
-                            showNotification('All data cleared', 'success');
-                        }
-                    });
-                }
-            });
-        }
-        
-        function deleteInactiveSessions() {
-            fetch('/delete-inactive', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' }
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    showNotification(`Deleted ${data.deleted_count} inactive sessions`, 'success');
-                    loadHistory();
-                }
-            });
-        }
+            rows.append((msg_id, str(session_id), sender, as_text(recipient_email, ''), subject,
+                         body_preview, full_content, int(received_time), 0))
+        except Exception as e:
+            print(f"Error storing message: {e}")
+            continue
+    return rows
+
+# Seconds a request waits for its messages to be committed
+WRITE_WAIT_TIMEOUT = 10
+
+class PendingWrite:
+    """Completion of a queued batch; error is set if the batch wasn't stored"""
+    def __init__(self):
+        self._done = threading.Event()
+        self.error = None
+    
+    def set(self, error=None):
+        self.error = error
+        self._done.set()
+    
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+# (rows, session_id, PendingWrite) batches waiting for the writer thread
+write_queue = queue.Queue()
+
+def store_messages_in_db(messages, session_id, recipient_email):
+    """Queue messages for the writer thread; the returned PendingWrite is set once written"""
+    done = PendingWrite()
+    rows = parse_message_rows(messages, session_id, recipient_email) if messages else []
+    if not rows:
+        # Nothing to write, so don't wake the writer or touch the database
+        done.set()
+        return done
+    write_queue.put_nowait((rows, session_id, done))
+    return done
+
+def insert_message_rows(rows):
+    with write_pool.transaction() as conn:
+        # One prepared statement and one commit; the content-derived primary
+        # key skips messages that are already stored
+        conn.executemany('''
+            INSERT OR IGNORE INTO messages 
+            (message_id, session_id, sender, recipient, subject, body_preview, full_content, received_at, is_read)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+def write_message_batches(batches):
+    """Insert queued batches, possibly from several sessions, in one transaction
+    
+    If that fails, each batch is retried on its own so a bad row only loses
+    its own batch. Returns each batch's error, None for the stored ones.
+    """
+    try:
+        insert_message_rows([row for rows, _, _ in batches for row in rows])
+        errors = [None] * len(batches)
+    except Exception as e:
+        if len(batches) == 1:
+            errors = [e]
+        else:
+            errors = []
+            for rows, _, _ in batches:
+                try:
+                    insert_message_rows(rows)
+                    errors.append(None)
+                except Exception as batch_error:
+                    errors.append(batch_error)
+    for (_, session_id, _), error in zip(batches, errors):
+        if error is None:
+            invalidate_session(session_id)
+    return errors
+
+def message_writer_loop():
+    """Drain write_queue, committing whatever has piled up as one transaction"""
+    while True:
+        batches = [write_queue.get()]
+        while True:
+            try:
+                batches.append(write_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        try:
+            errors = write_message_batches(batches)
+        except Exception as e:
+            errors = [e] * len(batches)
+        for (_, _, done), error in zip(batches, errors):
+            if error is not None:
+                print(f"Error storing messages: {error}")
+            done.set(error)
+            write_queue.task_done()
+
+def flush_writes():
+    """Block until every queued message batch has been written"""
+    write_queue.join()
+
+threading.Thread(target=message_writer_loop, name='message-writer', daemon=True).start()
+
+# Largest page a client may ask for, matching the page's biggest setting
+MAX_PAGE_SIZE = 100
+
+def page_limit(data, default):
+    """The request's page size clamped to 1..MAX_PAGE_SIZE, or None if it isn't a number"""
+    try:
+        limit = int(data.get('limit', default))
+    except (TypeError, ValueError):
+        return None
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def get_session_messages(session_id, limit=50, before_ts=None, before_id=None, unread_only=False):
+    """Retrieve a page of messages for a session, newest first
+    
+    Pages are addressed by a (before_ts, before_id) keyset cursor taken from
+    the last message of the previous page, so deep pages cost the same as
+    the first one.
+    """
+    with read_pool.acquire() as conn:
+        query = '''
+            SELECT message_id, sender, recipient, subject, body_preview, 
+                   full_content, received_at, is_read
+            FROM messages 
+            WHERE session_id = ?
+        '''
+        params = [session_id]
         
-        function downloadDatabase() {
-            fetch('/download-db')
-            .then(response => response.blob())
-            .then(blob => {
-                const url = window.URL.createObjectURL(blob);
-                const a = document.createElement('a');
-                a.href = url;
-                a.download = `tempmail_backup_${new Date().toISOString().split('T')[0]}.db`;
-                document.body.appendChild(a);
-                a.click();
-                document.body.removeChild(a);
-                window.URL.revokeObjectURL(url);
-                showNotification('Database backup downloaded', 'success');
-            });
-        }
+        if unread_only:
+            query += ' AND is_read = 0'
         
-        // Dashboard Functions
-        function updateDashboard() {
-            fetch('/get-stats', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' }
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    document.getElementById('statTotalMessages').textContent = data.stats.total_messages || 0;
-                    document.getElementById('statUnreadMessages').textContent = data.stats.unread_messages || 0;
-                    document.getElementById('statActiveSessions').textContent = data.stats.active_sessions || 0;
-                    document.getElementById('statDeleted').textContent = data.stats.deleted_messages || 0;
-                }
-            });
-        }
+        if before_ts is not None:
+            query += ' AND (received_at, message_id) < (?, ?)'
+            params.extend([before_ts, before_id or ''])
         
-        function checkAllSessions() {
-            // Implementation for checking all sessions
-            showNotification('Refreshing all sessions...', 'info');
-            // You would implement API call here
-        }
+        # Fetch one extra row to learn whether another page exists
+        query += ' ORDER BY received_at DESC, message_id DESC LIMIT ?'
+        params.append(limit + 1)
         
-        function clearAllSessions() {
-            Swal.fire({
-                title: 'Clear All Sessions?',
-                text: 'This will deactivate all active sessions',
-                icon: 'warning',
-                showCancelButton: true,
-                confirmButtonColor: '#d33',
-                cancelButtonColor: '#3085d6',
-                confirmButtonText: 'Clear All'
-            }).then((result) => {
-                if (result.isConfirmed) {
-                    fetch('/clear-all-sessions', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' }
-                    })
-                    .then(response => response.json())
-                    .then(data => {
-                        if (data.success) {
-                            currentSession = null;
-                            currentEmail = null;
-                            updateSessionInfo();
-                            showNotification('All sessions cleared', 'success');
-                        }
-                    });
-                }
-            });
-        }
+        cursor = conn.execute(query, params)
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         
-        // Utility Functions
-        function updateSessionInfo() {
-            if (!currentSession) return;
-            
-            fetch('/get-session-stats', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ session_id: currentSession })
+        messages = []
+        for row in rows:
+            messages.append({
+                'id': row[0],
+                'sender': row[1],
+                'recipient': row[2],
+                'subject': row[3],
+                'preview': row[4],
+                'content': row[5],
+                'time': row[6],
+                'is_read': bool(row[7])
             })
-            .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    document.getElementById('sidebarTotal').textContent = data.stats.total_messages;
-                    document.getElementById('sidebarUnread').textContent = data.stats.unread_messages;
-                    document.getElementById('unreadBadge').textContent = data.stats.unread_messages;
-                }
-            });
-        }
-        
-        function updateLastCheckTime() {
-            const now = new Date();
-            document.getElementById('lastCheckTime').innerHTML = `
-                <i class="fas fa-clock"></i> Last check: ${now.toLocaleTimeString([], {hour: '2-digit', minute:'2-digit'})}
-            `;
-        }
         
-        function showNotification(message, type = 'info') {
-            const Toast = Swal.mixin({
-                toast: true,
-                position: 'top-end',
-                showConfirmButton: false,
-                timer: 3000,
-                timerProgressBar: true,
-                didOpen: (toast) => {
-                    toast.addEventListener('mouseenter', Swal.stopTimer);
-                    toast.addEventListener('mouseleave', Swal.resumeTimer);
-                }
-            });
-            
-            Toast.fire({
-                icon: type,
-                title: message
-            });
-        }
+        # Get counts on the same connection
+        stats = cached_session_stats(session_id, conn)
+    
+    next_cursor = None
+    if has_more:
+        next_cursor = {'before_ts': rows[-1][6], 'before_id': rows[-1][0]}
+    
+    return {
+        'messages': messages,
+        'total': stats['total_messages'],
+        'unread': stats['unread_messages'],
+        'has_more': has_more,
+        'next_cursor': next_cursor
+    }
+
+def mark_as_read(message_id, session_id):
+    """Mark a message as read"""
+    with write_pool.transaction() as conn:
+        cursor = conn.execute(
+            'UPDATE messages SET is_read = 1 WHERE message_id = ? AND session_id = ? AND is_read = 0',
+            (message_id, session_id)
+        )
+    # Re-reading an already read message leaves the cached stats valid
+    if cursor.rowcount:
+        invalidate_session(session_id)
+    return True
+
+def delete_message(message_id, session_id):
+    """Delete a specific message"""
+    with write_pool.transaction() as conn:
+        conn.execute(
+            'DELETE FROM messages WHERE message_id = ? AND session_id = ?',
+            (message_id, session_id)
+        )
+    invalidate_session(session_id)
+    drop_cached_message(session_id, message_id)
+    return True
+
+EXPORT_MIME_TYPES = {
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'txt': 'text/plain'
+}
+
+def iter_session_messages(session_id, batch_size=500):
+    """Yield every message of a session, newest first, a batch at a time
+    
+    Each batch is a keyset page read on a connection held only for that
+    query, so a slow download neither pins a pooled connection nor keeps a
+    read transaction open between batches.
+    """
+    cursor_key = None
+    while True:
+        query = '''
+            SELECT message_id, sender, recipient, subject, body_preview,
+                   full_content, received_at, is_read
+            FROM messages
+            WHERE session_id = ?
+        '''
+        params = [session_id]
+        if cursor_key is not None:
+            query += ' AND (received_at, message_id) < (?, ?)'
+            params.extend(cursor_key)
+        query += ' ORDER BY received_at DESC, message_id DESC LIMIT ?'
+        params.append(batch_size)
         
-        function escapeHtml(text) {
-            const div = document.createElement('div');
-            div.textContent = text;
-            return div.innerHTML;
-        }
+        with read_pool.acquire() as conn:
+            rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return
         
-        // Initialize
-        document.addEventListener('DOMContentLoaded', function() {
-            loadSettings();
-            updateDashboard();
-            
-            // Check for existing session in localStorage
-            const savedSession = localStorage.getItem('current_session');
-            if (savedSession) {
-                const sessionData = JSON.parse(savedSession);
-                currentSession = sessionData.session_id;
-                currentEmail = sessionData.email;
-                document.getElementById('sidebarEmail').textContent = currentEmail;
-                updateSessionInfo();
+        for row in rows:
+            yield {
+                'id': row[0],
+                'sender': row[1],
+                'recipient': row[2],
+                'subject': row[3],
+                'preview': row[4],
+                'content': row[5],
+                'time': format_ms(row[6]),
+                'is_read': bool(row[7])
             }
-            
-            // Save session on page unload
-            window.addEventListener('beforeunload', function() {
-                if (currentSession && currentEmail) {
-                    localStorage.setItem('current_session', JSON.stringify({
-                        session_id: currentSession,
-                        email: currentEmail
-                    }));
-                }
-            });
-        });
-    </script>
-</body>
-</html>
-'''
+        if len(rows) < batch_size:
+            return
+        cursor_key = (rows[-1][6], rows[-1][0])
+
+def export_messages(session_id, format_type='json'):
+    """Export messages in specified format, yielding the output in chunks"""
+    messages = iter_session_messages(session_id)
+    
+    if format_type == 'json':
+        # Same layout as json.dumps(messages, indent=2), one message at a time
+        empty = True
+        yield '['
+        for msg in messages:
+            item = orjson.dumps(msg, option=orjson.OPT_INDENT_2).decode()
+            yield ('\n' if empty else ',\n') + '\n'.join('  ' + line for line in item.split('\n'))
+            empty = False
+        yield ']' if empty else '\n]'
+    elif format_type == 'csv':
+        # csv.writer only writes to files, so reuse a one-row buffer
+        line = io.StringIO()
+        writer = csv.writer(line)
+        rows = ([
+            msg['sender'],
+            msg['recipient'],
+            msg['subject'],
+            msg['preview'],
+            msg['time'],
+            'Yes' if msg['is_read'] else 'No'
+        ] for msg in messages)
+        for row in itertools.chain([['Sender', 'Recipient', 'Subject', 'Preview', 'Received At', 'Read']], rows):
+            writer.writerow(row)
+            yield line.getvalue()
+            line.seek(0)
+            line.truncate()
+    elif format_type == 'txt':
+        separator = ''
+        for msg in messages:
+            yield separator + "\n".join([
+                f"From: {msg['sender']}",
+                f"To: {msg['recipient']}",
+                f"Subject: {msg['subject']}",
+                f"Time: {msg['time']}",
+                f"Preview: {msg['preview']}",
+                "-" * 50
+            ])
+            separator = "\n"
+
+# Export formats yield a piece per message or row; pieces are joined into
+# chunks of about this size so the server writes fewer, larger blocks
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def chunked(pieces, size=EXPORT_CHUNK_SIZE):
+    """Join a stream of small strings into chunks of roughly size characters"""
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield ''.join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield ''.join(buffer)
+
+def load_session_stats(session_id, conn):
+    """Query message statistics and session info for a session in one statement"""
+    stats = conn.execute('''
+        SELECT 
+            COUNT(*) as total,
+            SUM(CASE WHEN is_read = 0 THEN 1 ELSE 0 END) as unread,
+            MIN(received_at) as first_msg,
+            MAX(received_at) as last_msg,
+            (SELECT email FROM sessions WHERE session_id = ?1) as email,
+            (SELECT created_at FROM sessions WHERE session_id = ?1) as created_at
+        FROM messages 
+        WHERE session_id = ?1
+    ''', (session_id,)).fetchone()
+    
+    return {
+        'total_messages': stats[0] if stats[0] else 0,
+        'unread_messages': stats[1] if stats[1] else 0,
+        'first_message': stats[2],
+        'last_message': stats[3],
+        'email': stats[4] if stats[4] is not None else 'Unknown',
+        'created_at': stats[5]
+    }
+
+def cached_session_stats(session_id, conn=None):
+    """Session statistics, served from stats_cache until the next write
+    
+    Pass conn to reuse a connection the caller already holds on a cache miss.
+    """
+    with stats_lock:
+        cached = stats_cache.get(session_id)
+        if cached is not None:
+            return cached
+        # A newer computation for the same session replaces this token; only
+        # the latest one may store its result
+        token = stats_loads[session_id] = object()
+    
+    stats = None
+    try:
+        if conn is None:
+            with read_pool.acquire() as conn:
+                stats = load_session_stats(session_id, conn)
+        else:
+            stats = load_session_stats(session_id, conn)
+    finally:
+        with stats_lock:
+            if stats_loads.get(session_id) is token:
+                del stats_loads[session_id]
+                if stats is not None:
+                    stats_cache[session_id] = stats
+    return stats
+
+def inbox_etag(session_id, stats, *query):
+    """ETag for a page of a session's inbox
+    
+    Derived from the newest message time and the total and unread counts,
+    which change on every write that affects what the page shows.
+    """
+    version = (session_id, stats['last_message'], stats['total_messages'],
+               stats['unread_messages']) + query
+    return hashlib.sha1(repr(version).encode()).hexdigest()[:16]
+
+def load_global_stats(conn):
+    """Message and session counts across every session"""
+    # One pass over messages for both message counts
+    total_messages, unread_messages, active_sessions_count, deleted_messages = conn.execute('''
+        SELECT COUNT(*),
+               COALESCE(SUM(is_read = 0), 0),
+               (SELECT COUNT(*) FROM sessions WHERE is_active = 1),
+               (SELECT value FROM stats_counters WHERE name = 'deleted_messages')
+        FROM messages
+    ''').fetchone()
+    return {
+        'total_messages': total_messages,
+        'unread_messages': unread_messages,
+        'active_sessions': active_sessions_count,
+        # Kept by the count_deleted_messages trigger
+        'deleted_messages': deleted_messages
+    }
+
+def cached_global_stats(conn=None):
+    """Global statistics, recomputed at most every GLOBAL_STATS_TTL seconds"""
+    if global_stats['expires'] > time.monotonic():
+        return global_stats['value']
+    # Callers may already hold a pooled connection, so the connection is
+    # always taken before the lock, never while holding it
+    if conn is None:
+        with read_pool.acquire() as conn:
+            return cached_global_stats(conn)
+    with global_stats_lock:
+        if global_stats['expires'] > time.monotonic():
+            return global_stats['value']
+        stats = load_global_stats(conn)
+        global_stats['value'] = stats
+        global_stats['expires'] = time.monotonic() + GLOBAL_STATS_TTL
+        return stats
+
+def not_modified(etag):
+    """A bodiless 304 if the request already holds etag, otherwise None"""
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+# The same error body answers every request that arrives without a session
+# id, so it is serialized once
+MISSING_SESSION_BODY = app.json.dumps({'success': False, 'error': 'Missing session ID'}) + '\n'
+
+def missing_session():
+    """The response for a request that didn't name a session"""
+    return Response(MISSING_SESSION_BODY, mimetype='application/json')
+
+def get_session_stats(session_id, conn=None):
+    """Get statistics for a session"""
+    stats = dict(cached_session_stats(session_id, conn))
+    stats['active'] = get_active_session(session_id, conn) is not None
+    return stats
+
+
+# Static assets are linked with a content hash so browsers can cache them forever
+asset_versions = {}
+
+def asset_version(filename):
+    """Content hash of a static file, as it appears in its URL"""
+    version = asset_versions.get(filename)
+    if version is None:
+        with open(os.path.join(app.static_folder, filename), 'rb') as f:
+            version = hashlib.sha1(f.read()).hexdigest()[:10]
+        asset_versions[filename] = version
+    return version
+
+@app.template_global()
+def asset_url(filename):
+    stem, ext = os.path.splitext(filename)
+    return url_for('static', filename=f'{stem}.{asset_version(filename)}{ext}')
+
+# Static URLs carry the content hash in the file name (css/app.<hash>.css);
+# strip it before the static view looks for the file on disk
+HASHED_ASSET = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{10})(?P<ext>\.\w+)$')
+
+@app.url_value_preprocessor
+def strip_asset_hash(endpoint, values):
+    if endpoint == 'static':
+        match = HASHED_ASSET.match(values['filename'])
+        g.asset_hash = match['hash'] if match else None
+        if match:
+            values['filename'] = match['stem'] + match['ext']
+
+def compress_body(body):
+    """Precompressed copies of a response body, keyed by Content-Encoding"""
+    variants = {'gzip': gzip.compress(body, 9)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=11)
+    return variants
+
+def negotiate_encoding(variants):
+    """Pick the best precompressed variant the client accepts, if any"""
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and request.accept_encodings[encoding]:
+            return encoding
+    return None
+
+def compressed_response(response, variants):
+    """Swap in a precompressed body for the client's Accept-Encoding"""
+    response.headers['Vary'] = 'Accept-Encoding'
+    encoding = negotiate_encoding(variants)
+    if encoding:
+        response.direct_passthrough = False
+        response.set_data(variants[encoding])
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+# Compressed bodies of static assets, built once per process
+compressed_assets = {}
+
+def compressed_asset(filename):
+    variants = compressed_assets.get(filename)
+    if variants is None:
+        with open(os.path.join(app.static_folder, filename), 'rb') as f:
+            variants = compress_body(f.read())
+        compressed_assets[filename] = variants
+    return variants
+
+@app.template_global()
+def inline_css(filename):
+    """Contents of a static stylesheet, minified for a <style> block"""
+    with open(os.path.join(app.static_folder, filename), encoding='utf-8') as f:
+        css = f.read()
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return Markup(css.strip())
+
+@app.after_request
+def cache_versioned_assets(response):
+    if request.endpoint == 'static' and g.get('asset_hash') and response.status_code == 200:
+        filename = request.view_args['filename']
+        # Only cache forever what the hash actually names; a stale or made-up
+        # hash (e.g. another instance mid-deploy) gets the default caching
+        if g.asset_hash == asset_version(filename):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        if filename.endswith(('.css', '.js')):
+            compressed_response(response, compressed_asset(filename))
+    return response
+
+# JSON bodies are compressed per response at a cheaper gzip level than the
+# precompressed assets; small ones aren't worth the CPU
+JSON_COMPRESS_MIN_SIZE = 512
+
+@app.after_request
+def compress_json(response):
+    if (response.mimetype != 'application/json' or response.status_code != 200
+            or response.is_streamed or 'Content-Encoding' in response.headers):
+        return response
+    body = response.get_data()
+    if len(body) < JSON_COMPRESS_MIN_SIZE:
+        return response
+    response.vary.add('Accept-Encoding')
+    if request.accept_encodings['gzip']:
+        response.set_data(gzip.compress(body, 6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def render_index():
+    """Render the index page outside of any request
+    
+    asset_url needs a request context to build the static URLs.
+    """
+    with app.test_request_context('/'):
+        return render_template('index.html')
+
+# The index page has no per-request content, so it is rendered, compressed
+# and tagged once at import
+INDEX_HTML = render_index().encode('utf-8')
+INDEX_VARIANTS = compress_body(INDEX_HTML)
+INDEX_ETAG = hashlib.blake2b(INDEX_HTML, digest_size=8).hexdigest()
+
+# Sent as a Link header so the browser can start these before parsing the page
+with app.test_request_context('/'):
+    INDEX_LINKS = ', '.join([
+        f"<{asset_url('css/app.css')}>; rel=preload; as=style",
+        f"<{asset_url('css/icons.css')}>; rel=preload; as=style",
+        f"<{asset_url('js/app.js')}>; rel=preload; as=script",
+        '<https://cdn.jsdelivr.net>; rel=preconnect',
+        '<https://fonts.gstatic.com>; rel=preconnect; crossorigin',
+    ])
 
 # Flask Routes
 @app.route('/')
 def index():
-    return render_template_string(HTML_TEMPLATE)
+    if request.if_none_match.contains(INDEX_ETAG):
+        response = Response(status=304)
+        response.headers['Vary'] = 'Accept-Encoding'
+    else:
+        response = compressed_response(Response(INDEX_HTML, mimetype='text/html'), INDEX_VARIANTS)
+    response.set_etag(INDEX_ETAG)
+    # Always revalidate; a matching ETag makes that a bodiless 304
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Link'] = INDEX_LINKS
+    return response
 
 @app.route('/generate-email', methods=['POST'])
 def generate_email_endpoint():
@@ -2350,12 +1139,16 @@ def check_inbox_endpoint():
         return jsonify({'success': False, 'error': 'Missing data'})
     
     # Update session activity
-    if session_id in active_sessions:
-        active_sessions[session_id].update_activity()
+    session = get_active_session(session_id)
+    if session:
+        session.update_activity()
     
     # Get new messages from external API
     raw_data = get_inbox(email, session_id)
     
+    if raw_data and raw_data.get('error'):
+        return jsonify({'success': False, 'error': raw_data['error']})
+    
     if raw_data and 'messages' in raw_data:
         # Get unread count from database
         messages_data = get_session_messages(session_id, unread_only=True)
@@ -2372,26 +1165,109 @@ def check_inbox_endpoint():
         'status': 'no_messages'
     })
 
+# Inbox streams poll the upstream inbox themselves and push a count update
+# only when something changed. A stream ends after STREAM_LIFETIME seconds
+# (serverless functions can't hold a response open indefinitely) and the
+# browser reconnects on its own. Each event id carries the counts it sent, so
+# a reconnect presenting Last-Event-ID skips re-sending unchanged counts.
+STREAM_LIFETIME = 50
+STREAM_MIN_INTERVAL = 5
+# Each open stream holds a worker for its lifetime; past this many, new
+# streams are refused with a 503 and the page polls instead
+MAX_STREAMS = 32
+stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
+
+@app.route('/inbox/stream')
+def inbox_stream():
+    session_id = request.args.get('session')
+    session = get_active_session(session_id) if session_id else None
+    if not session:
+        return jsonify({'success': False, 'error': 'Unknown session'}), 404
+    
+    interval = max(STREAM_MIN_INTERVAL, request.args.get('interval', 10, type=int))
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    
+    if not stream_slots.acquire(blocking=False):
+        response = jsonify({'success': False, 'error': 'Too many open streams'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(STREAM_LIFETIME)
+        return response
+    
+    def events():
+        yield f'retry: {interval * 1000}\n\n'
+        last_sent = last_event_id
+        deadline = time.monotonic() + STREAM_LIFETIME
+        while True:
+            session.update_activity()
+            get_inbox(session.email, session_id)
+            stats = cached_session_stats(session_id)
+            counts = {'total': stats['total_messages'], 'unread': stats['unread_messages']}
+            event_id = f"{counts['total']}-{counts['unread']}"
+            if event_id != last_sent:
+                yield f'id: {event_id}\ndata: {orjson.dumps(counts).decode()}\n\n'
+                last_sent = event_id
+            else:
+                # A named event rather than a comment, so the page sees it
+                yield 'event: keepalive\ndata: {}\n\n'
+            
+            if time.monotonic() + interval > deadline:
+                return
+            time.sleep(interval)
+    
+    response = Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs when the server closes the response, even if it was never read
+    response.call_on_close(stream_slots.release)
+    return response
+
 @app.route('/get-messages', methods=['POST'])
 def get_messages_endpoint():
     data = request.json
     session_id = data.get('session_id')
-    limit = data.get('limit', 25)
-    offset = data.get('offset', 0)
+    limit = page_limit(data, 25)
+    before_ts = data.get('before_ts')
+    before_id = data.get('before_id')
     unread_only = data.get('unread_only', False)
     
     if not session_id:
-        return jsonify({'success': False, 'error': 'Missing session ID'})
+        return missing_session()
+    if limit is None:
+        return jsonify({'success': False, 'error': 'Invalid limit'}), 400
     
-    messages_data = get_session_messages(session_id, limit, offset, unread_only)
+    # Most polls find the inbox unchanged; answer those with a bodiless 304
+    stats = cached_session_stats(session_id)
+    etag = inbox_etag(session_id, stats, limit, before_ts, before_id, unread_only)
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
     
-    return jsonify({
+    messages_data = get_session_messages(session_id, limit, before_ts, before_id, unread_only)
+    
+    response = jsonify({
         'success': True,
         'messages': messages_data['messages'],
         'total': messages_data['total'],
         'unread': messages_data['unread'],
-        'has_more': messages_data['has_more']
+        'has_more': messages_data['has_more'],
+        'next_cursor': messages_data['next_cursor']
     })
+    response.set_etag(etag)
+    return response
+
+def message_response(session_id, message_id, message, mark_read):
+    """Reply to /get-message, marking the message read first when asked
+    
+    Opening a message marks it read; doing that here saves the viewer a
+    separate /mark-read round trip, and the new unread count comes back
+    with the message.
+    """
+    payload = {'success': True, 'message': message}
+    if mark_read:
+        mark_as_read(message_id, session_id)
+        payload['unread'] = cached_session_stats(session_id)['unread_messages']
+    return jsonify(payload)
 
 @app.route('/get-message', methods=['POST'])
 def get_message_endpoint():
@@ -2402,7 +1278,11 @@ def get_message_endpoint():
     if not session_id or not message_id:
         return jsonify({'success': False, 'error': 'Missing data'})
     
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
+    cached = message_cache.get(session_id)
+    if cached and message_id in cached:
+        return message_response(session_id, message_id, cached[message_id], data.get('mark_read'))
+    
+    with read_pool.acquire() as conn:
         cursor = conn.execute('''
             SELECT sender, recipient, subject, body_preview, full_content, received_at
             FROM messages 
@@ -2410,19 +1290,21 @@ def get_message_endpoint():
         ''', (session_id, message_id))
         
         row = cursor.fetchone()
-        
-        if row:
-            return jsonify({
-                'success': True,
-                'message': {
-                    'sender': row[0],
-                    'recipient': row[1],
-                    'subject': row[2],
-                    'preview': row[3],
-                    'content': row[4],
-                    'time': row[5]
-                }
-            })
+    
+    if row:
+        message = {
+            'sender': row[0],
+            'recipient': row[1],
+            'subject': row[2],
+            'preview': row[3],
+            'content': row[4],
+            'time': row[5]
+        }
+        if cached is None:
+            cached = {}
+            message_cache[session_id] = cached
+        cached[message_id] = message
+        return message_response(session_id, message_id, message, data.get('mark_read'))
     
     return jsonify({'success': False, 'error': 'Message not found'})
 
@@ -2444,14 +1326,14 @@ def mark_all_read_endpoint():
     session_id = data.get('session_id')
     
     if not session_id:
-        return jsonify({'success': False, 'error': 'Missing session ID'})
+        return missing_session()
     
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
+    with write_pool.transaction() as conn:
         conn.execute(
             'UPDATE messages SET is_read = 1 WHERE session_id = ?',
             (session_id,)
         )
-        conn.commit()
+    invalidate_session(session_id)
     
     return jsonify({'success': True})
 
@@ -2473,14 +1355,15 @@ def delete_all_messages_endpoint():
     session_id = data.get('session_id')
     
     if not session_id:
-        return jsonify({'success': False, 'error': 'Missing session ID'})
+        return missing_session()
     
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
+    with write_pool.transaction() as conn:
         conn.execute(
             'DELETE FROM messages WHERE session_id = ?',
             (session_id,)
         )
-        conn.commit()
+    invalidate_session(session_id)
+    drop_cached_messages(session_id)
     
     return jsonify({'success': True})
 
@@ -2490,47 +1373,71 @@ def delete_session_endpoint():
     session_id = data.get('session_id')
     
     if not session_id:
-        return jsonify({'success': False, 'error': 'Missing session ID'})
-    
-    if session_id in active_sessions:
-        active_sessions[session_id].deactivate()
+        return missing_session()
     
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-        conn.execute('UPDATE sessions SET is_active = 0 WHERE session_id = ?', (session_id,))
+    # Deactivating the session and deleting its messages commit together
+    session = active_sessions.get(session_id)
+    with write_pool.transaction() as conn:
+        if session:
+            session.deactivate(conn)
+        else:
+            conn.execute('UPDATE sessions SET is_active = 0 WHERE session_id = ?', (session_id,))
         conn.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
-        conn.commit()
+    invalidate_session(session_id)
+    drop_cached_messages(session_id)
     
     return jsonify({'success': True})
 
 @app.route('/get-sessions', methods=['POST'])
 def get_sessions_endpoint():
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-        cursor = conn.execute('''
-            SELECT s.session_id, s.email, s.created_at, s.last_activity, s.is_active,
-                   COUNT(m.message_id) as total_messages,
-                   SUM(CASE WHEN m.is_read = 0 THEN 1 ELSE 0 END) as unread_messages
-            FROM sessions s
-            LEFT JOIN messages m ON s.session_id = m.session_id
-            GROUP BY s.session_id
-            ORDER BY s.last_activity DESC
-        ''')
-        
-        rows = cursor.fetchall()
+    # Sessions are paged by a (before_activity, before_id) keyset cursor, the
+    # same way get_session_messages pages the inbox
+    data = request.get_json(silent=True) or {}
+    limit = page_limit(data, 50)
+    before_activity = data.get('before_activity')
+    before_id = data.get('before_id')
+    if limit is None:
+        return jsonify({'success': False, 'error': 'Invalid limit'}), 400
+    
+    query = '''
+        SELECT s.session_id, s.email, s.created_at, s.last_activity, s.is_active,
+               (SELECT COUNT(*) FROM messages m
+                WHERE m.session_id = s.session_id) as total_messages,
+               (SELECT COUNT(*) FROM messages m
+                WHERE m.session_id = s.session_id AND m.is_read = 0) as unread_messages
+        FROM sessions s
+    '''
+    params = []
+    if before_activity is not None:
+        query += ' WHERE (s.last_activity, s.session_id) < (?, ?)'
+        params.extend([before_activity, before_id or ''])
+    # Fetch one extra row to learn whether another page exists
+    query += ' ORDER BY s.last_activity DESC, s.session_id DESC LIMIT ?'
+    params.append(limit + 1)
+    
+    with read_pool.acquire() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        # Counts come from per-row lookups on the covering (session_id, is_read)
+        # index, so only the page's sessions touch messages
+        cursor.execute(query, params)
+        
+        # Active sessions are loaded into memory lazily, so the stored flag is
+        # what says whether a session is active
         sessions = []
-        
-        for row in rows:
-            sessions.append({
-                'session_id': row[0],
-                'email': row[1],
-                'created_at': row[2],
-                'last_activity': row[3],
-                'is_active': bool(row[4]),
-                'total_messages': row[5] or 0,
-                'unread_messages': row[6] or 0,
-                'active': row[0] in active_sessions
-            })
-        
-        return jsonify({'success': True, 'sessions': sessions})
+        for row in cursor:
+            is_active = bool(row['is_active'])
+            sessions.append(dict(row, is_active=is_active, active=is_active))
+    
+    next_cursor = None
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        next_cursor = {
+            'before_activity': sessions[-1]['last_activity'],
+            'before_id': sessions[-1]['session_id']
+        }
+    
+    return jsonify({'success': True, 'sessions': sessions, 'next_cursor': next_cursor})
 
 @app.route('/activate-session', methods=['POST'])
 def activate_session_endpoint():
@@ -2538,22 +1445,23 @@ def activate_session_endpoint():
     session_id = data.get('session_id')
     
     if not session_id:
-        return jsonify({'success': False, 'error': 'Missing session ID'})
+        return missing_session()
     
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-        cursor = conn.execute('SELECT email FROM sessions WHERE session_id = ?', (session_id,))
-        row = cursor.fetchone()
-        
-        if row:
-            # Reactivate session
-            email = row[0]
-            session = TempMailSession(email, session_id)
-            
-            return jsonify({
-                'success': True,
-                'email': email,
-                'session_id': session_id
-            })
+    # Reactivating only flips the stored flag; get_active_session builds the
+    # in-memory session from the row the first time it is needed
+    with write_pool.transaction() as conn:
+        row = conn.execute(
+            'UPDATE sessions SET is_active = 1, last_activity = ? WHERE session_id = ? RETURNING email',
+            (now_ms(), session_id)
+        ).fetchone()
+    
+    if row:
+        invalidate_session(session_id)
+        return jsonify({
+            'success': True,
+            'email': row[0],
+            'session_id': session_id
+        })
     
     return jsonify({'success': False, 'error': 'Session not found'})
 
@@ -2563,71 +1471,90 @@ def get_session_stats_endpoint():
     session_id = data.get('session_id')
     
     if not session_id:
-        return jsonify({'success': False, 'error': 'Missing session ID'})
+        return missing_session()
     
     stats = get_session_stats(session_id)
-    return jsonify({'success': True, 'stats': stats})
+    etag = inbox_etag(session_id, stats, stats['active'])
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    
+    response = jsonify({'success': True, 'stats': stats})
+    response.set_etag(etag)
+    return response
 
 @app.route('/get-stats', methods=['POST'])
 def get_stats_endpoint():
-    with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-        # Total messages
-        cursor = conn.execute('SELECT COUNT(*) FROM messages')
-        total_messages = cursor.fetchone()[0] or 0
-        
-        # Unread messages
-        cursor = conn.execute('SELECT COUNT(*) FROM messages WHERE is_read = 0')
-        unread_messages = cursor.fetchone()[0] or 0
-        
-        # Active sessions
-        cursor = conn.execute('SELECT COUNT(*) FROM sessions WHERE is_active = 1')
-        active_sessions_count = cursor.fetchone()[0] or 0
-        
-        # Deleted messages (estimated)
-        deleted_messages = max(0, total_messages - unread_messages - 100)
-        
-        return jsonify({
-            'success': True,
-            'stats': {
-                'total_messages': total_messages,
-                'unread_messages': unread_messages,
-                'active_sessions': active_sessions_count,
-                'deleted_messages': deleted_messages
-            }
-        })
+    stats = cached_global_stats()
+    
+    counts = (stats['total_messages'], stats['unread_messages'], stats['active_sessions'],
+              stats['deleted_messages'])
+    etag = hashlib.sha1(repr(counts).encode()).hexdigest()[:16]
+    unchanged = not_modified(etag)
+    if unchanged:
+        return unchanged
+    
+    response = jsonify({'success': True, 'stats': stats})
+    response.set_etag(etag)
+    return response
+
+@app.route('/sync', methods=['POST'])
+def sync_endpoint():
+    """Answer several read endpoints in one response
+    
+    The page asks for the dashboard and session counters together; `include`
+    names the parts wanted ('stats', 'session_stats', 'messages'), each
+    shaped like the response of /get-stats, /get-session-stats and
+    /get-messages respectively.
+    """
+    data = request.json or {}
+    session_id = data.get('session_id')
+    include = set(data.get('include', ()))
+    limit = page_limit(data, 25)
+    if limit is None:
+        return jsonify({'success': False, 'error': 'Invalid limit'}), 400
+    result = {'success': True}
+    
+    with read_pool.acquire() as conn:
+        if 'stats' in include:
+            result['stats'] = cached_global_stats(conn)
+        if session_id and 'session_stats' in include:
+            result['session_stats'] = get_session_stats(session_id, conn)
+    
+    if session_id and 'messages' in include:
+        result['messages'] = get_session_messages(session_id, limit)
+    
+    return jsonify(result)
 
-@app.route('/export-messages', methods=['POST'])
+@app.route('/export-messages', methods=['GET', 'POST'])
 def export_messages_endpoint():
-    data = request.json
+    # GET lets the page point a plain download link here
+    data = request.args if request.method == 'GET' else request.json
     session_id = data.get('session_id')
     format_type = data.get('format', 'json')
     
     if not session_id:
-        return jsonify({'success': False, 'error': 'Missing session ID'})
+        return missing_session()
+    if format_type not in EXPORT_MIME_TYPES:
+        return jsonify({'success': False, 'error': 'Unsupported export format'}), 400
     
-    content = export_messages(session_id, format_type)
-    
-    mime_types = {
-        'json': 'application/json',
-        'csv': 'text/csv',
-        'txt': 'text/plain'
-    }
-    
-    return jsonify({
-        'success': True,
-        'content': content,
-        'format': format_type,
-        'mime_type': mime_types.get(format_type, 'text/plain')
-    })
+    filename = f"tempmail_export_{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.{format_type}"
+    return Response(
+        chunked(export_messages(session_id, format_type)),
+        mimetype=EXPORT_MIME_TYPES[format_type],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 @app.route('/clear-database', methods=['POST'])
 def clear_database_endpoint():
     try:
-        with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
+        with write_pool.transaction() as conn:
             conn.execute('DELETE FROM messages')
             conn.execute('DELETE FROM sessions')
             conn.execute('DELETE FROM archives')
-            conn.commit()
+            # Wiping the database starts the counters over
+            conn.execute('UPDATE stats_counters SET value = 0')
+        invalidate_all_sessions()
         
         # Clear active sessions
         active_sessions.clear()
@@ -2640,56 +1567,74 @@ def clear_database_endpoint():
 @app.route('/delete-inactive', methods=['POST'])
 def delete_inactive_endpoint():
     try:
-        with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-            # Find inactive sessions (older than 24 hours)
-            cutoff = datetime.utcnow() - timedelta(hours=24)
-            
-            cursor = conn.execute('''
-                SELECT session_id FROM sessions 
-                WHERE is_active = 0 AND last_activity < ?
+        with write_pool.transaction() as conn:
+            # Inactive sessions older than 24 hours go, messages first
+            cutoff = now_ms() - 24 * 60 * 60 * 1000
+            conn.execute('''
+                DELETE FROM messages WHERE session_id IN (
+                    SELECT session_id FROM sessions
+                    WHERE is_active = 0 AND last_activity < ?
+                )
             ''', (cutoff,))
-            
-            inactive_sessions = cursor.fetchall()
-            
-            # Delete messages for inactive sessions
-            for session in inactive_sessions:
-                session_id = session[0]
-                conn.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
-                conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
-                
-                # Remove from active sessions if present
-                if session_id in active_sessions:
-                    del active_sessions[session_id]
-            
-            conn.commit()
-            
-            return jsonify({
-                'success': True,
-                'deleted_count': len(inactive_sessions)
-            })
+            inactive_sessions = conn.execute('''
+                DELETE FROM sessions
+                WHERE is_active = 0 AND last_activity < ?
+                RETURNING session_id
+            ''', (cutoff,)).fetchall()
+        
+        for (session_id,) in inactive_sessions:
+            active_sessions.pop(session_id, None)
+            invalidate_session(session_id)
+            drop_cached_messages(session_id)
+        
+        return jsonify({
+            'success': True,
+            'deleted_count': len(inactive_sessions)
+        })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/clear-all-sessions', methods=['POST'])
 def clear_all_sessions_endpoint():
     try:
-        # Deactivate all sessions
-        for session_id in list(active_sessions.keys()):
-            active_sessions[session_id].deactivate()
+        sessions = active_sessions.values()
+        for session in sessions:
+            session.is_active = False
+        
+        # Deactivate all sessions in one transaction, flushing the activity
+        # that update_activity held back with one prepared statement
+        with write_pool.transaction() as conn:
+            conn.executemany(
+                'UPDATE sessions SET last_activity = ? WHERE session_id = ?',
+                [(session.last_check, session.session_id) for session in sessions]
+            )
+            conn.execute('UPDATE sessions SET is_active = 0 WHERE is_active = 1')
         
         active_sessions.clear()
         
-        with closing(sqlite3.connect('temp_mail.db', check_same_thread=False)) as conn:
-            conn.execute('UPDATE sessions SET is_active = 0')
-            conn.commit()
-        
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/download-db')
 def download_db():
-    return send_file('temp_mail.db', as_attachment=True)
+    # The live file can change mid-download and misses whatever is still in
+    # the WAL, so send a consistent copy made with the online backup API
+    fd, snapshot_path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        with read_pool.acquire() as conn, closing(sqlite3.connect(snapshot_path)) as snapshot:
+            conn.backup(snapshot)
+        snapshot_file = open(snapshot_path, 'rb')
+    finally:
+        # The open handle keeps the data readable until the response closes it
+        os.unlink(snapshot_path)
+    return send_file(
+        snapshot_file,
+        mimetype='application/octet-stream',
+        as_attachment=True,
+        download_name=f"tempmail_backup_{datetime.now(timezone.utc).strftime('%Y-%m-%d')}.db"
+    )
 
 # Vercel deployment compatibility
 if __name__ == "__main__":
@@ -0,0 +1,1258 @@
+// Global variables
+let currentSession = null;
+let currentEmail = null;
+let autoRefreshTimer = null;
+let inboxStream = null;
+let inboxModel = [];
+let inboxCursor = null;
+let sessionsCursor = null;
+
+// Elements the script touches, looked up once; the script is deferred, so
+// the document has been parsed by the time this runs
+const $ = Object.fromEntries([
+    'autoRefresh',
+    'currentEmailDisplay',
+    'emailDisplay',
+    'emailStatus',
+    'emptyStateTpl',
+    'generatorLoading',
+    'historyLoading',
+    'inboxLoading',
+    'lastCheckTime',
+    'maxMessages',
+    'messageViewTpl',
+    'messagesContainer',
+    'messagesList',
+    'msgRowTpl',
+    'sessionCardTpl',
+    'sessionsList',
+    'sidebarEmail',
+    'sidebarTotal',
+    'sidebarUnread',
+    'statActiveSessions',
+    'statDeleted',
+    'statTotalMessages',
+    'statUnreadMessages',
+    'unreadBadge'
+].map(id => [id, document.getElementById(id)]));
+
+// Bursts of clicks or refresh triggers collapse into one request, sent
+// REQUEST_DEBOUNCE_MS after the last call
+const REQUEST_DEBOUNCE_MS = 250;
+
+function debounce(fn, wait) {
+    let timer = null;
+    return function (...args) {
+        clearTimeout(timer);
+        timer = setTimeout(() => fn.apply(this, args), wait);
+    };
+}
+
+// Per-item variant: repeated calls for the same id collapse, calls for
+// different ids each still go through
+function debounceById(fn, wait) {
+    const timers = new Map();
+    return function (id, ...args) {
+        clearTimeout(timers.get(id));
+        timers.set(id, setTimeout(() => {
+            timers.delete(id);
+            fn.call(this, id, ...args);
+        }, wait));
+    };
+}
+
+// JSON POSTs go through postJSON: an identical request already in flight is
+// shared rather than sent again, and each caller gets its own clone of the
+// response to read
+const inflightRequests = new Map();
+
+function postJSON(url, body, { headers = {}, signal } = {}) {
+    const payload = body === undefined ? undefined : JSON.stringify(body);
+    const key = `${url}|${payload}|${JSON.stringify(headers)}`;
+    let entry = inflightRequests.get(key);
+    if (!entry || (entry.signal && entry.signal.aborted)) {
+        const request = fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', ...headers },
+            body: payload,
+            signal: signal
+        });
+        entry = { request: request, signal: signal };
+        inflightRequests.set(key, entry);
+        const done = () => {
+            if (inflightRequests.get(key) === entry) {
+                inflightRequests.delete(key);
+            }
+        };
+        request.then(done, done);
+    }
+    return entry.request.then(response => response.clone());
+}
+
+// Responses that carry an ETag are remembered per URL and body; repeating
+// the request sends If-None-Match, and a 304 resolves to null
+const responseEtags = new Map();
+
+function postConditional(url, body, options = {}) {
+    const key = `${url}|${JSON.stringify(body)}`;
+    const etag = responseEtags.get(key);
+    const headers = etag ? { 'If-None-Match': etag } : {};
+    return postJSON(url, body, { ...options, headers: headers })
+    .then(response => {
+        if (response.status === 304) {
+            return null;
+        }
+        const tag = response.headers.get('ETag');
+        if (tag) {
+            responseEtags.set(key, tag);
+        } else {
+            responseEtags.delete(key);
+        }
+        return response.json();
+    });
+}
+
+function ignoreAbort(error) {
+    if (error.name !== 'AbortError') {
+        throw error;
+    }
+}
+
+const DEFAULT_SETTINGS = {
+    autoRefresh: 10,
+    maxMessages: 25
+};
+let settings = { ...DEFAULT_SETTINGS };
+// Serialized form of what localStorage holds, so unchanged saves are skipped
+let storedSettings = null;
+
+// Load settings from localStorage, once, when the page starts
+function loadSettings() {
+    storedSettings = localStorage.getItem('tempmail_settings');
+    if (storedSettings) {
+        try {
+            const saved = JSON.parse(storedSettings);
+            settings = {
+                autoRefresh: Number(saved.autoRefresh ?? DEFAULT_SETTINGS.autoRefresh),
+                maxMessages: Number(saved.maxMessages ?? DEFAULT_SETTINGS.maxMessages)
+            };
+        } catch (e) {
+            settings = { ...DEFAULT_SETTINGS };
+        }
+        $.autoRefresh.value = settings.autoRefresh;
+        $.maxMessages.value = settings.maxMessages;
+    }
+}
+
+function saveSettings() {
+    settings.autoRefresh = parseInt($.autoRefresh.value);
+    settings.maxMessages = parseInt($.maxMessages.value);
+    const serialized = JSON.stringify(settings);
+    if (serialized !== storedSettings) {
+        localStorage.setItem('tempmail_settings', serialized);
+        storedSettings = serialized;
+    }
+    setupAutoRefresh();
+    showNotification('Settings saved successfully!', 'success');
+}
+
+// New mail is pushed over an EventSource stream while the tab is visible;
+// browsers without EventSource, or a stream that gives up, fall back to
+// polling refreshInbox, also only while visible. Polls back off while
+// nothing arrives: each empty check stretches the delay by POLL_BACKOFF up
+// to POLL_MAX_DELAY, and new mail or a manual refresh resets it to the
+// configured interval (at least SAVE_DATA_MIN_DELAY with Save-Data on)
+const POLL_BACKOFF = 1.5;
+const POLL_MAX_DELAY = 120000;
+const SAVE_DATA_MIN_DELAY = 30000;
+let pollingInbox = false;
+let pollDelay = 0;
+let polledUnread = 0;
+
+function startPolling() {
+    pollingInbox = true;
+    pollDelay = 0;
+    polledUnread = 0;
+    refreshInbox(true);
+}
+
+function scheduleNextPoll(reset) {
+    clearTimeout(autoRefreshTimer);
+    const saveData = navigator.connection && navigator.connection.saveData;
+    const floor = Math.max(settings.autoRefresh * 1000, saveData ? SAVE_DATA_MIN_DELAY : 0);
+    pollDelay = reset || !pollDelay ? floor : Math.min(pollDelay * POLL_BACKOFF, Math.max(POLL_MAX_DELAY, floor));
+    autoRefreshTimer = setTimeout(() => refreshInbox(true), pollDelay);
+}
+
+function stopAutoRefresh() {
+    pollingInbox = false;
+    if (autoRefreshTimer) {
+        clearTimeout(autoRefreshTimer);
+        autoRefreshTimer = null;
+    }
+    if (inboxStream) {
+        inboxStream.close();
+        inboxStream = null;
+    }
+}
+
+function setupAutoRefresh() {
+    stopAutoRefresh();
+
+    if (settings.autoRefresh <= 0 || !currentSession || document.visibilityState !== 'visible') {
+        return;
+    }
+
+    if (window.EventSource) {
+        const session = currentSession;
+        let lastUnread = null;
+        const stream = new EventSource(`/inbox/stream?session=${encodeURIComponent(session)}&interval=${settings.autoRefresh}`);
+        inboxStream = stream;
+
+        const fallBackToPolling = () => {
+            if (inboxStream === stream) {
+                stream.close();
+                inboxStream = null;
+                startPolling();
+            }
+        };
+        // The server sends an event every interval, keepalives included. A
+        // proxy that buffers the response leaves the stream connecting with
+        // nothing arriving, so after two silent intervals poll instead
+        const armWatchdog = () => {
+            clearTimeout(autoRefreshTimer);
+            autoRefreshTimer = setTimeout(fallBackToPolling, settings.autoRefresh * 2000);
+        };
+        armWatchdog();
+
+        stream.addEventListener('keepalive', armWatchdog);
+        stream.addEventListener('message', event => {
+            armWatchdog();
+            const counts = JSON.parse(event.data);
+            updateLastCheckTime();
+            renderSessionStats({ total_messages: counts.total, unread_messages: counts.unread });
+            if (activeSection === 'inbox') {
+                loadInbox();
+            }
+            if (lastUnread !== null && counts.unread > lastUnread) {
+                showNotification(`${counts.unread - lastUnread} new message(s) received!`, 'info');
+            }
+            lastUnread = counts.unread;
+        });
+        stream.addEventListener('error', () => {
+            if (stream.readyState === EventSource.CLOSED && session === currentSession) {
+                fallBackToPolling();
+            }
+        });
+    } else {
+        startPolling();
+    }
+}
+
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'visible') {
+        setupAutoRefresh();
+    } else {
+        stopAutoRefresh();
+    }
+});
+
+// The current session is written through to localStorage whenever it
+// changes, so it survives crashes and doesn't need an unload handler
+function setCurrentSession(sessionId, email) {
+    if (sessionId !== currentSession) {
+        // A 304 only means "unchanged" for the session already on screen
+        responseEtags.clear();
+    }
+    currentSession = sessionId;
+    currentEmail = email;
+    if (sessionId) {
+        localStorage.setItem('current_session', JSON.stringify({
+            session_id: sessionId,
+            email: email
+        }));
+    } else {
+        localStorage.removeItem('current_session');
+    }
+}
+
+// Navigation
+// Rapid successive switches are coalesced: only the last requested section
+// is shown and loaded, in the next animation frame
+let pendingSection = null;
+// Hidden sections are not fetched or rendered; switching to one loads it
+let activeSection = 'dashboard';
+// Aborted on every switch so loads for a section left behind are dropped
+let sectionAbort = new AbortController();
+
+function switchSection(sectionId) {
+    if (pendingSection === null) {
+        requestAnimationFrame(showPendingSection);
+    }
+    pendingSection = sectionId;
+}
+
+function showPendingSection() {
+    const sectionId = pendingSection;
+    pendingSection = null;
+    activeSection = sectionId;
+    sectionAbort.abort();
+    sectionAbort = new AbortController();
+
+    // Update active nav link
+    document.querySelectorAll('.nav-link').forEach(link => {
+        link.classList.toggle('active', link.dataset.section === sectionId);
+    });
+
+    // Show corresponding section
+    document.querySelectorAll('.content-section').forEach(section => {
+        section.classList.toggle('active', section.id === sectionId);
+    });
+
+    // Load section data
+    if (sectionId === 'inbox' && currentSession) {
+        loadInbox();
+    } else if (sectionId === 'history') {
+        loadHistory();
+    } else if (sectionId === 'dashboard') {
+        updateDashboard();
+    }
+}
+
+document.querySelector('.nav-menu').addEventListener('click', e => {
+    const link = e.target.closest('.nav-link');
+    if (!link) return;
+    e.preventDefault();
+    switchSection(link.dataset.section);
+});
+
+// Email Generation
+function generateEmail(type = 'standard') {
+    if (type === 'custom') {
+        fireDialog({
+            title: 'Custom Email Prefix',
+            input: 'text',
+            inputLabel: 'Enter a prefix for your email',
+            inputPlaceholder: 'e.g., myprefix',
+            showCancelButton: true,
+            confirmButtonText: 'Generate',
+            preConfirm: (prefix) => {
+                if (!prefix) {
+                    Swal.showValidationMessage('Please enter a prefix');
+                    return false;
+                }
+                return prefix;
+            }
+        }).then((result) => {
+            if (result.isConfirmed) {
+                performEmailGeneration(result.value);
+            }
+        });
+    } else {
+        performEmailGeneration();
+    }
+}
+
+function performEmailGeneration(customPrefix = null) {
+    const loading = $.generatorLoading;
+    const display = $.emailDisplay;
+
+    loading.style.display = 'block';
+    display.style.display = 'none';
+
+    let requestData = { type: 'standard' };
+    if (customPrefix) {
+        requestData = { type: 'custom', prefix: customPrefix };
+    }
+
+    postJSON('/generate-email', requestData)
+    .then(response => response.json())
+    .then(data => {
+        loading.style.display = 'none';
+        display.style.display = 'block';
+
+        if (data.success) {
+            setCurrentSession(data.session_id, data.email);
+
+            renderSessionUI({
+                currentEmailDisplay: currentEmail,
+                emailStatus: `Generated ${new Date().toLocaleTimeString()}`,
+                sidebarEmail: currentEmail
+            });
+
+            // Update session info
+            updateSessionInfo();
+
+            // Start auto-refresh if enabled
+            setupAutoRefresh();
+
+            showNotification('New email generated successfully!', 'success');
+
+            // Switch to inbox after generation
+            setTimeout(() => switchSection('inbox'), 500);
+        } else {
+            showNotification('Failed to generate email: ' + (data.error || 'Unknown error'), 'error');
+        }
+    })
+    .catch(error => {
+        loading.style.display = 'none';
+        display.style.display = 'block';
+        showNotification('Network error: ' + error.message, 'error');
+    });
+}
+
+function copyCurrentEmail() {
+    if (!currentEmail) {
+        showNotification('No email to copy', 'warning');
+        return;
+    }
+
+    navigator.clipboard.writeText(currentEmail).then(() => {
+        showNotification('Email copied to clipboard!', 'success');
+    }).catch(err => {
+        showNotification('Failed to copy: ' + err, 'error');
+    });
+}
+
+function deleteCurrentSession() {
+    if (!currentSession) {
+        showNotification('No active session', 'warning');
+        return;
+    }
+
+    fireDialog({
+        title: 'Delete Session?',
+        text: 'This will remove all messages for this email',
+        icon: 'warning',
+        showCancelButton: true,
+        confirmButtonColor: '#d33',
+        cancelButtonColor: '#3085d6',
+        confirmButtonText: 'Yes, delete it!'
+    }).then((result) => {
+        if (result.isConfirmed) {
+            postJSON('/delete-session', { session_id: currentSession })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    setCurrentSession(null, null);
+                    stopAutoRefresh();
+                    renderSessionUI({
+                        currentEmailDisplay: 'Not generated yet',
+                        sidebarEmail: 'No active session',
+                        sidebarTotal: '0',
+                        sidebarUnread: '0',
+                        unreadBadge: '0'
+                    });
+                    showNotification('Session deleted successfully', 'success');
+                    switchSection('dashboard');
+                }
+            });
+        }
+    });
+}
+
+// Inbox Management
+function loadInbox() {
+    if (!currentSession) {
+        showEmptyState($.messagesContainer, 'fa-envelope', 'Generate an email first to view messages');
+        responseEtags.clear();
+        return;
+    }
+    if (activeSection !== 'inbox') {
+        updateSessionInfo();
+        return;
+    }
+
+    const loading = $.inboxLoading;
+    const container = $.messagesContainer;
+
+    loading.style.display = 'block';
+    container.style.display = 'none';
+
+    postConditional('/get-messages', {
+        session_id: currentSession,
+        limit: settings.maxMessages
+    }, { signal: sectionAbort.signal })
+    .then(data => {
+        loading.style.display = 'none';
+        container.style.display = 'block';
+
+        if (data === null) {
+            updateLastCheckTime();
+        } else if (data.success) {
+            displayMessages(data.messages, data.next_cursor);
+            updateLastCheckTime();
+            // The page carries the session's counts already
+            renderSessionStats({ total_messages: data.total, unread_messages: data.unread });
+        }
+    })
+    .catch(error => {
+        loading.style.display = 'none';
+        container.style.display = 'block';
+        if (error.name !== 'AbortError') {
+            showNotification('Error loading messages: ' + error.message, 'error');
+        }
+    });
+}
+
+const refreshInbox = debounce(function (fromPoll = false) {
+    if (!currentSession) {
+        showNotification('No active session', 'warning');
+        return;
+    }
+
+    $.lastCheckTime.innerHTML = `<i class="fas fa-sync-alt fa-spin"></i> Checking...`;
+
+    postJSON('/check-inbox', {
+        session_id: currentSession,
+        email: currentEmail
+    })
+    .then(response => response.json())
+    .then(data => {
+        updateLastCheckTime();
+        if (data.success) {
+            loadInbox();
+            if (data.new_count > 0) {
+                showNotification(`${data.new_count} new message(s) received!`, 'info');
+            }
+        }
+        if (pollingInbox) {
+            scheduleNextPoll(!fromPoll || data.new_count > polledUnread);
+            polledUnread = data.new_count || 0;
+        }
+    })
+    .catch(() => {
+        if (pollingInbox) {
+            scheduleNextPoll(false);
+        }
+    });
+}, REQUEST_DEBOUNCE_MS);
+
+// Long lists are rendered a window at a time: the next slice is appended
+// when a sentinel after the last rendered row scrolls into view. Once every
+// item is on screen, loadMore (if given) is asked for the next page; it
+// resolves to more items, or to an empty list when there are none left
+const LIST_WINDOW_SIZE = 20;
+const listObservers = new WeakMap();
+
+function renderWindowed(container, items, renderItem, scrollRoot = null, loadMore = null) {
+    const previous = listObservers.get(container);
+    if (previous) {
+        previous.disconnect();
+    }
+
+    let rendered = 0;
+    let scheduled = false;
+    const sentinel = document.createElement('div');
+
+    const renderNext = () => {
+        if (rendered === items.length && loadMore) {
+            const finish = more => {
+                if (listObservers.get(container) !== observer) return;
+                if (more && more.length > 0) {
+                    items.push(...more);
+                } else {
+                    loadMore = null;
+                }
+                renderNext();
+            };
+            loadMore().then(finish, () => finish(null));
+            return;
+        }
+
+        scheduled = false;
+        const slice = items.slice(rendered, rendered + LIST_WINDOW_SIZE);
+        rendered += slice.length;
+        const fragment = document.createDocumentFragment();
+        slice.forEach(item => {
+            const node = renderItem(item);
+            if (node) {
+                fragment.appendChild(node);
+            }
+        });
+        container.insertBefore(fragment, sentinel);
+
+        observer.unobserve(sentinel);
+        if (rendered < items.length || loadMore) {
+            // Re-observing reports the sentinel again if it is still visible
+            observer.observe(sentinel);
+        } else {
+            observer.disconnect();
+            sentinel.remove();
+        }
+    };
+
+    const observer = new IntersectionObserver(entries => {
+        if (!scheduled && entries.some(entry => entry.isIntersecting)) {
+            scheduled = true;
+            requestAnimationFrame(renderNext);
+        }
+    }, { root: scrollRoot, rootMargin: '300px' });
+    listObservers.set(container, observer);
+
+    container.replaceChildren(sentinel);
+    renderNext();
+}
+
+// Markup for rows and placeholders lives in <template> elements and is
+// cloned, with text filled in through data-slot elements
+function cloneTemplate(id, slots = {}) {
+    const node = $[id].content.firstElementChild.cloneNode(true);
+    for (const [slot, text] of Object.entries(slots)) {
+        node.querySelector(`[data-slot="${slot}"]`).textContent = text;
+    }
+    return node;
+}
+
+function showEmptyState(container, icon, text) {
+    const observer = listObservers.get(container);
+    if (observer) {
+        observer.disconnect();
+        listObservers.delete(container);
+    }
+
+    const node = cloneTemplate('emptyStateTpl', { text: text });
+    node.querySelector('i').className = `fas ${icon}`;
+    container.replaceChildren(node);
+}
+
+// Rendered rows are kept by message id and reused on later refreshes, so
+// only messages that are new since the last render are built from scratch
+const messageRows = new Map();
+
+function showRowAsRead(row) {
+    row.classList.remove('unread');
+    row.querySelector('.message-subject i').className = 'fas fa-envelope-open';
+    const readButton = row.querySelector('[data-action="read"]');
+    if (readButton) {
+        readButton.remove();
+    }
+}
+
+function renderMessageItem(msg) {
+    if (msg.deleted) {
+        return null;
+    }
+
+    const existing = messageRows.get(msg.id);
+    if (existing) {
+        if (msg.is_read) {
+            showRowAsRead(existing);
+        }
+        return existing;
+    }
+
+    const row = cloneTemplate('msgRowTpl', {
+        sender: msg.sender || 'Unknown Sender',
+        time: DATE_TIME_FORMAT.format(msg.time),
+        subject: msg.subject || 'No Subject',
+        preview: msg.preview || 'No preview available'
+    });
+    row.dataset.id = msg.id;
+
+    if (msg.is_read) {
+        showRowAsRead(row);
+    } else {
+        row.classList.add('unread');
+    }
+    messageRows.set(msg.id, row);
+    return row;
+}
+
+function displayMessages(messages, nextCursor = null) {
+    const container = $.messagesContainer;
+    inboxModel = messages || [];
+    inboxCursor = nextCursor;
+
+    const ids = new Set(inboxModel.map(msg => msg.id));
+    for (const id of messageRows.keys()) {
+        if (!ids.has(id)) {
+            messageRows.delete(id);
+        }
+    }
+
+    if (inboxModel.length === 0) {
+        showEmptyState(container, 'fa-inbox', 'No messages yet. Send emails to your address to see them here.');
+        return;
+    }
+
+    renderWindowed(container, inboxModel, renderMessageItem, $.messagesList, loadOlderMessages);
+}
+
+// Older pages are fetched with the keyset cursor from the previous page as
+// the inbox is scrolled to its end
+function loadOlderMessages() {
+    if (!inboxCursor) {
+        return Promise.resolve([]);
+    }
+
+    const session = currentSession;
+    return postJSON('/get-messages', {
+        session_id: session,
+        limit: settings.maxMessages,
+        before_ts: inboxCursor.before_ts,
+        before_id: inboxCursor.before_id
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success || session !== currentSession) {
+            return [];
+        }
+        inboxCursor = data.next_cursor;
+        return data.messages;
+    });
+}
+
+// Row buttons are handled by one listener on the container rather than a
+// handler per rendered row
+$.messagesContainer.addEventListener('click', e => {
+    const button = e.target.closest('[data-action]');
+    if (!button) return;
+    const messageId = button.closest('[data-id]').dataset.id;
+    if (button.dataset.action === 'read') {
+        markAsRead(messageId);
+    } else if (button.dataset.action === 'view') {
+        viewMessage(messageId);
+    } else if (button.dataset.action === 'delete') {
+        deleteMessage(messageId);
+    }
+});
+
+function findInboxMessage(messageId) {
+    return inboxModel.find(msg => msg.id === messageId);
+}
+
+const markAsRead = debounceById(function (messageId) {
+    postJSON('/mark-read', {
+        session_id: currentSession,
+        message_id: messageId
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showMessageAsRead(messageId);
+            updateSessionInfo();
+        }
+    });
+}, REQUEST_DEBOUNCE_MS);
+
+function showMessageAsRead(messageId) {
+    const msg = findInboxMessage(messageId);
+    if (msg) {
+        msg.is_read = true;
+    }
+    const row = messageRows.get(messageId);
+    if (row) {
+        showRowAsRead(row);
+    }
+}
+
+function viewMessage(messageId) {
+    // The server marks the message read in the same request
+    const msg = findInboxMessage(messageId);
+    postJSON('/get-message', {
+        session_id: currentSession,
+        message_id: messageId,
+        mark_read: !(msg && msg.is_read)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            fireDialog({
+                titleText: data.message.subject || 'No Subject',
+                html: cloneTemplate('messageViewTpl', {
+                    sender: data.message.sender,
+                    recipient: data.message.recipient,
+                    time: DATE_TIME_FORMAT.format(data.message.time),
+                    content: data.message.content
+                }),
+                width: '800px',
+                showCloseButton: true,
+                showConfirmButton: false
+            });
+
+            showMessageAsRead(messageId);
+            if (data.unread !== undefined) {
+                renderSessionUI({ sidebarUnread: data.unread, unreadBadge: data.unread });
+            }
+        }
+    });
+}
+
+const deleteMessage = debounceById(function (messageId) {
+    fireDialog({
+        title: 'Delete Message?',
+        text: 'This action cannot be undone',
+        icon: 'warning',
+        showCancelButton: true,
+        confirmButtonColor: '#d33',
+        cancelButtonColor: '#3085d6',
+        confirmButtonText: 'Delete'
+    }).then((result) => {
+        if (result.isConfirmed) {
+            postJSON('/delete-message', {
+                session_id: currentSession,
+                message_id: messageId
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    const msg = findInboxMessage(messageId);
+                    if (msg) {
+                        msg.deleted = true;
+                    }
+                    const msgElement = messageRows.get(messageId);
+                    messageRows.delete(messageId);
+                    if (msgElement) {
+                        msgElement.style.opacity = '0';
+                        setTimeout(() => msgElement.remove(), 300);
+                    }
+                    updateSessionInfo();
+                    showNotification('Message deleted', 'success');
+                }
+            });
+        }
+    });
+}, REQUEST_DEBOUNCE_MS);
+
+function markAllAsRead() {
+    if (!currentSession) return;
+
+    postJSON('/mark-all-read', { session_id: currentSession })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            inboxModel.forEach(msg => {
+                msg.is_read = true;
+            });
+            // One write pass in the next frame, touching only rows still unread
+            const unreadRows = [...messageRows.values()].filter(row => row.classList.contains('unread'));
+            requestAnimationFrame(() => unreadRows.forEach(showRowAsRead));
+            updateSessionInfo();
+            showNotification('All messages marked as read', 'success');
+        }
+    });
+}
+
+function deleteAllMessages() {
+    if (!currentSession) return;
+
+    fireDialog({
+        title: 'Delete All Messages?',
+        text: 'This will remove all messages for this session',
+        icon: 'warning',
+        showCancelButton: true,
+        confirmButtonColor: '#d33',
+        cancelButtonColor: '#3085d6',
+        confirmButtonText: 'Delete All'
+    }).then((result) => {
+        if (result.isConfirmed) {
+            postJSON('/delete-all-messages', { session_id: currentSession })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    inboxModel = [];
+                    messageRows.clear();
+                    showEmptyState($.messagesContainer, 'fa-inbox', 'All messages have been deleted');
+                    updateSessionInfo();
+                    showNotification('All messages deleted', 'success');
+                }
+            });
+        }
+    });
+}
+
+// Session History
+function renderSessionCard(session) {
+    const isActive = session.session_id === currentSession;
+    const card = cloneTemplate('sessionCardTpl', {
+        email: session.email,
+        status: session.is_active ? 'Active' : 'Inactive',
+        created: DATE_TIME_FORMAT.format(session.created_at),
+        lastActive: DATE_TIME_FORMAT.format(session.last_activity),
+        total: session.total_messages,
+        unread: session.unread_messages,
+        active: session.active ? 'Yes' : 'No'
+    });
+    if (isActive) {
+        card.classList.add('active');
+    }
+    card.querySelector('[data-slot="status"]').classList.add(session.is_active ? 'active' : 'inactive');
+
+    card.dataset.sessionId = session.session_id;
+    card.querySelector(`[data-action="${isActive ? 'activate' : 'open'}"]`).remove();
+    return card;
+}
+
+$.sessionsList.addEventListener('click', e => {
+    const button = e.target.closest('[data-action]');
+    if (!button) return;
+    if (button.dataset.action === 'open') {
+        switchSection('inbox');
+    } else if (button.dataset.action === 'activate') {
+        activateSession(button.closest('[data-session-id]').dataset.sessionId);
+    }
+});
+
+function loadHistory() {
+    if (activeSection !== 'history') return;
+
+    const loading = $.historyLoading;
+    const container = $.sessionsList;
+
+    loading.style.display = 'block';
+
+    postJSON('/get-sessions', undefined, { signal: sectionAbort.signal })
+    .then(response => response.json())
+    .then(data => {
+        loading.style.display = 'none';
+
+        if (data.success && data.sessions.length > 0) {
+            sessionsCursor = data.next_cursor;
+            renderWindowed(container, data.sessions, renderSessionCard, document.querySelector('.main-content'), loadOlderSessions);
+        } else {
+            showEmptyState(container, 'fa-history', 'No session history found');
+        }
+    })
+    .catch(ignoreAbort);
+}
+
+// Like the inbox, older sessions are fetched page by page as the history
+// list is scrolled to its end
+function loadOlderSessions() {
+    if (!sessionsCursor) {
+        return Promise.resolve([]);
+    }
+
+    return postJSON('/get-sessions', sessionsCursor, { signal: sectionAbort.signal })
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            return [];
+        }
+        sessionsCursor = data.next_cursor;
+        return data.sessions;
+    });
+}
+
+function activateSession(sessionId) {
+    postJSON('/activate-session', { session_id: sessionId })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            setCurrentSession(sessionId, data.email);
+            renderSessionUI({ currentEmailDisplay: currentEmail, sidebarEmail: currentEmail });
+            updateSessionInfo();
+            setupAutoRefresh();
+            switchSection('inbox');
+            showNotification('Session activated', 'success');
+        }
+    });
+}
+
+// Export Functions
+function exportData(format) {
+    if (!currentSession) {
+        showNotification('No active session to export', 'warning');
+        return;
+    }
+
+    // Let the browser stream the file to disk instead of buffering a blob
+    const params = new URLSearchParams({ session_id: currentSession, format: format });
+    startDownload(`/export-messages?${params}`);
+    showNotification(`Exporting as ${format.toUpperCase()}`, 'success');
+}
+
+// One hidden anchor, created on first use, serves every download
+let downloadLink = null;
+
+function startDownload(url) {
+    if (!downloadLink) {
+        downloadLink = document.createElement('a');
+        downloadLink.hidden = true;
+        downloadLink.download = '';
+        document.body.appendChild(downloadLink);
+    }
+    downloadLink.href = url;
+    downloadLink.click();
+}
+
+function showExportOptions() {
+    fireDialog({
+        title: 'Export Messages',
+        text: 'Choose export format:',
+        showCancelButton: true,
+        showDenyButton: true,
+        showConfirmButton: true,
+        confirmButtonText: 'JSON',
+        denyButtonText: 'CSV',
+        cancelButtonText: 'Text'
+    }).then((result) => {
+        if (result.isConfirmed) {
+            exportData('json');
+        } else if (result.isDenied) {
+            exportData('csv');
+        } else if (window.Swal && result.dismiss === Swal.DismissReason.cancel) {
+            exportData('txt');
+        }
+    });
+}
+
+// Database Management
+function clearDatabase() {
+    fireDialog({
+        title: 'Clear All Data?',
+        text: 'This will delete ALL sessions and messages. This action cannot be undone!',
+        icon: 'warning',
+        showCancelButton: true,
+        confirmButtonColor: '#d33',
+        cancelButtonColor: '#3085d6',
+        confirmButtonText: 'Yes, clear everything!'
+    }).then((result) => {
+        if (result.isConfirmed) {
+            postJSON('/clear-database')
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    setCurrentSession(null, null);
+                    stopAutoRefresh();
+                    updateSessionInfo();
+                    switchSection('dashboard');
+                    showNotification('All data cleared', 'success');
+                }
+            });
+        }
+    });
+}
+
+function deleteInactiveSessions() {
+    postJSON('/delete-inactive')
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showNotification(`Deleted ${data.deleted_count} inactive sessions`, 'success');
+            loadHistory();
+        }
+    });
+}
+
+function downloadDatabase() {
+    startDownload('/download-db');
+    showNotification('Database backup download started', 'success');
+}
+
+// Dashboard Functions
+const updateDashboard = debounce(function () {
+    postConditional('/get-stats', undefined, { signal: sectionAbort.signal })
+    .then(data => {
+        if (data && data.success) {
+            renderDashboardStats(data.stats);
+        }
+    })
+    .catch(ignoreAbort);
+}, REQUEST_DEBOUNCE_MS);
+
+function renderDashboardStats(stats) {
+    $.statTotalMessages.textContent = stats.total_messages || 0;
+    $.statUnreadMessages.textContent = stats.unread_messages || 0;
+    $.statActiveSessions.textContent = stats.active_sessions || 0;
+    $.statDeleted.textContent = stats.deleted_messages || 0;
+}
+
+// The dashboard and sidebar counters fetched together in one /sync request
+function syncCounters() {
+    const include = currentSession ? ['stats', 'session_stats'] : ['stats'];
+    postJSON('/sync', { session_id: currentSession, include: include })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            renderDashboardStats(data.stats);
+            if (data.session_stats) {
+                renderSessionStats(data.session_stats);
+            }
+        }
+    });
+}
+
+function checkAllSessions() {
+    // Implementation for checking all sessions
+    showNotification('Refreshing all sessions...', 'info');
+    // You would implement API call here
+}
+
+function clearAllSessions() {
+    fireDialog({
+        title: 'Clear All Sessions?',
+        text: 'This will deactivate all active sessions',
+        icon: 'warning',
+        showCancelButton: true,
+        confirmButtonColor: '#d33',
+        cancelButtonColor: '#3085d6',
+        confirmButtonText: 'Clear All'
+    }).then((result) => {
+        if (result.isConfirmed) {
+            postJSON('/clear-all-sessions')
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    setCurrentSession(null, null);
+                    stopAutoRefresh();
+                    updateSessionInfo();
+                    showNotification('All sessions cleared', 'success');
+                }
+            });
+        }
+    });
+}
+
+// Utility Functions
+// Timestamps arrive as epoch milliseconds and are formatted by shared
+// formatters; toLocaleString builds a new one on every call. The options
+// are the ones toLocaleString and the old last-check format used
+const DATE_TIME_FORMAT = new Intl.DateTimeFormat(undefined, {
+    year: 'numeric',
+    month: 'numeric',
+    day: 'numeric',
+    hour: 'numeric',
+    minute: 'numeric',
+    second: 'numeric'
+});
+const CHECK_TIME_FORMAT = new Intl.DateTimeFormat(undefined, { hour: '2-digit', minute: '2-digit' });
+
+// Text updates for the session fields (keyed by element id) are queued and
+// written together in the next animation frame
+let pendingSessionUI = null;
+
+function renderSessionUI(fields) {
+    if (!pendingSessionUI) {
+        pendingSessionUI = {};
+        requestAnimationFrame(() => {
+            const updates = pendingSessionUI;
+            pendingSessionUI = null;
+            for (const [id, text] of Object.entries(updates)) {
+                $[id].textContent = text;
+            }
+        });
+    }
+    Object.assign(pendingSessionUI, fields);
+}
+
+const updateSessionInfo = debounce(function () {
+    if (!currentSession) return;
+
+    postConditional('/get-session-stats', { session_id: currentSession })
+    .then(data => {
+        if (data && data.success) {
+            renderSessionStats(data.stats);
+        }
+    });
+}, REQUEST_DEBOUNCE_MS);
+
+function renderSessionStats(stats) {
+    renderSessionUI({
+        sidebarTotal: stats.total_messages,
+        sidebarUnread: stats.unread_messages,
+        unreadBadge: stats.unread_messages
+    });
+}
+
+function updateLastCheckTime() {
+    $.lastCheckTime.innerHTML = `
+        <i class="fas fa-clock"></i> Last check: ${CHECK_TIME_FORMAT.format(Date.now())}
+    `;
+}
+
+// SweetAlert loads asynchronously; dialogs opened before it arrives wait
+// for the script instead of throwing. The script tag records whether it
+// loaded or failed in data-state, since that can happen before this runs.
+// If it failed, dialogs fall back to the browser's own prompts
+let sweetAlertReady = null;
+
+function loadSweetAlert() {
+    if (window.Swal) {
+        return Promise.resolve();
+    }
+    const script = document.getElementById('sweetAlertScript');
+    if (script.dataset.state === 'failed') {
+        return Promise.reject(new Error('SweetAlert failed to load'));
+    }
+    return new Promise((resolve, reject) => {
+        script.addEventListener('load', resolve, { once: true });
+        script.addEventListener('error', reject, { once: true });
+    });
+}
+
+function fireDialog(options) {
+    if (!sweetAlertReady) {
+        sweetAlertReady = loadSweetAlert().catch(error => {
+            sweetAlertReady = null;
+            throw error;
+        });
+    }
+    return sweetAlertReady.then(() => Swal.fire(options), () => nativeDialog(options));
+}
+
+// Answers a dialog with prompt/confirm/alert, resolving to the same shape of
+// result SweetAlert would
+function nativeDialog(options) {
+    const title = options.title || options.titleText || '';
+    const text = options.html ? options.html.textContent.trim() : (options.text || '');
+    const message = text ? `${title}\n\n${text}` : title;
+
+    if (options.input) {
+        const value = window.prompt(`${message}\n${options.inputLabel || ''}`.trim());
+        return { isConfirmed: Boolean(value), value: value };
+    }
+    if (options.showCancelButton) {
+        return { isConfirmed: window.confirm(message) };
+    }
+    window.alert(message);
+    return { isConfirmed: true };
+}
+
+function showNotification(message, type = 'info') {
+    // SweetAlert loads asynchronously and may not be there yet
+    if (!window.Swal) {
+        console.log(message);
+        return;
+    }
+    
+    const Toast = Swal.mixin({
+        toast: true,
+        position: 'top-end',
+        showConfirmButton: false,
+        timer: 3000,
+        timerProgressBar: true,
+        didOpen: (toast) => {
+            toast.addEventListener('mouseenter', Swal.stopTimer);
+            toast.addEventListener('mouseleave', Swal.resumeTimer);
+        }
+    });
+
+    Toast.fire({
+        icon: type,
+        title: message
+    });
+}
+
+// Initialize
+document.addEventListener('DOMContentLoaded', function() {
+    loadSettings();
+
+    // Check for existing session in localStorage
+    const savedSession = localStorage.getItem('current_session');
+    if (savedSession) {
+        try {
+            const sessionData = JSON.parse(savedSession);
+            currentSession = sessionData.session_id;
+            currentEmail = sessionData.email;
+        } catch (e) {
+            localStorage.removeItem('current_session');
+        }
+    }
+    if (currentSession) {
+        $.sidebarEmail.textContent = currentEmail;
+        setupAutoRefresh();
+    }
+    syncCounters();
+});